@@ -4,6 +4,8 @@
 import streamlit as st
 import sys
 import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +14,7 @@ from ontology.ontology_manager import OntologyManager
 from ontology.reasoner import ConflictDetector
 from rag.retriever import RAGRetriever
 from llm.ollama_client import OllamaClient
+from llm.response_cache import ResponseCache, DiskResponseCache
 from llm.prompt_templates import SYSTEM_PROMPT, CHECK_AVAILABILITY_PROMPT, DETECT_CONFLICTS_PROMPT
 
 # Page configuration
@@ -22,6 +25,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Static page text, kept out of the tab bodies and stored without indentation
+EXAMPLE_QUESTIONS = [
+    "Is Dr. Smith available at 9 AM?",
+    "Which surgeons specialize in cardiology?",
+    "Show me all surgeries scheduled for today",
+    "Are there any conflicts in the current schedule?",
+    "Suggest a time slot for an emergency brain surgery"
+]
+EXAMPLE_QUESTIONS_MD = "\n".join(f"- {q}" for q in EXAMPLE_QUESTIONS)
+
+CONFLICT_INTRO_MD = """This system automatically detects:
+- 👨‍⚕️ **Surgeon Double-Bookings**: Same surgeon scheduled for multiple surgeries at overlapping times
+- 🏥 **Theatre Conflicts**: Same theatre booked for multiple surgeries simultaneously
+- 🔍 **Specialization Mismatches**: Surgeons operating in theatres outside their specialization"""
+
 def _get_value(prop, default=None):
     """Safely get a property value, handling both list and scalar values."""
     if prop is None:
@@ -30,50 +48,793 @@ def _get_value(prop, default=None):
         return prop[0] if prop else default
     return prop
 
+# Cached ontology reads, keyed on the ontology version so any save invalidates them.
+# Arguments prefixed with an underscore are not hashed by Streamlit.
+@st.cache_data(show_spinner=False)
+def _ontology_summary(version, _onto_mgr):
+    """Summary statistics for the sidebar"""
+    return _onto_mgr.get_ontology_summary()
+
+@st.cache_data(show_spinner=False)
+def _all_entity_names(version, _onto_mgr):
+    """Instance names for every class the UI lists, fetched in one query"""
+    return _onto_mgr.get_all_entities_bulk()
+
+def _entity_names(version, class_name, _onto_mgr):
+    """Names of all instances of an ontology class"""
+    return _all_entity_names(version, _onto_mgr)[class_name]
+
+@st.cache_data(show_spinner=False)
+def _timeslot_labels(version, _onto_mgr):
+    """Display label -> timeslot name for all timeslots, in ontology order"""
+    return {f"{ts.name} ({_get_value(ts.start_time, 'N/A')} - {_get_value(ts.end_time, 'N/A')})": ts.name
+            for ts in _onto_mgr.get_all_timeslots()}
+
+@st.cache_data(show_spinner=False)
+def _surgeries_by_timeslot(version, _onto_mgr):
+    """Index of timeslot name -> surgeries booked in it, built in one pass"""
+    by_ts = defaultdict(list)
+    for s in _onto_mgr.get_all_surgeries():
+        # Each owlready2 property read is a descriptor + quadstore lookup, so read each once
+        ts = s.has_timeslot
+        if ts:
+            po = s.performs_operation
+            rt = s.requires_theatre_type
+            by_ts[ts[0].name].append({
+                'surgery': s.name,
+                'surgeon': po[0].name if po else 'N/A',
+                'theatre': rt[0].name if rt else 'N/A'
+            })
+    return dict(by_ts)
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _cached_context(query, top_k, version, _rag, _query_embedding=None):
+    """Retrieved and formatted RAG context for a query; the short TTL keeps relative dates fresh"""
+    context = _rag.retrieve_context(query, top_k=top_k, query_embedding=_query_embedding)
+    return context, _rag.get_formatted_context(context)
+
+def _refresh_after_schedule_change(rag_retriever, response_cache):
+    """
+    Targeted invalidation after the ontology is edited. Version-keyed st.cache_data
+    entries miss on their own once save() bumps the version; only the RAG index and
+    cached answers need refreshing. Loaded resources (ontology, embedding model,
+    LLM client) stay warm.
+    """
+    rag_retriever.refresh_documents()
+    response_cache.clear()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _available_models(_llm_client):
+    """Models actually pulled in Ollama, refreshed at most every 5 minutes"""
+    return _llm_client.list_models()
+
+@st.cache_data(show_spinner=False)
+def _cached_conflicts(version, _conflict_detector):
+    """Full conflict scan, computed once per ontology version"""
+    return _conflict_detector.detect_all_conflicts()
+
+# Chat history window: older turns are dropped so reruns re-render a bounded list
+MAX_HISTORY = 20          # messages (10 user + 10 assistant)
+MAX_SOURCED_MESSAGES = 3  # most recent assistant messages that keep their sources
+CHAT_CONTEXT_MESSAGES = 6 # prior messages sent to the model with each question
+
+def _trim_chat_history():
+    """Keep the last MAX_HISTORY messages and drop sources (and unused previews) from older answers"""
+    history = st.session_state.chat_history[-MAX_HISTORY:]
+    
+    sourced = 0
+    for message in reversed(history):
+        if message.get('sources'):
+            sourced += 1
+            if sourced > MAX_SOURCED_MESSAGES:
+                message['sources'] = None
+    
+    in_use = {key for message in history for key in (message.get('sources') or [])}
+    st.session_state.source_store = {k: v for k, v in st.session_state.source_store.items() if k in in_use}
+    st.session_state.chat_history = history
+
 # Initialize session state
 if 'initialized' not in st.session_state:
     st.session_state.initialized = False
     st.session_state.chat_history = []
+    st.session_state.source_store = {}
 
 # Initialize system components
+def _start_llm_client():
+    """Create the LLM client (server health check) and load the model into Ollama"""
+    # keep_alive of an hour keeps the weights resident between chat turns
+    llm_client = OllamaClient(model="llama3.1:8b-instruct-q4_K_M", keep_alive="1h")  # Change model as needed
+    llm_client.warmup()
+    return llm_client
+
 @st.cache_resource
 def initialize_system():
     """Initialize all system components"""
     try:
-        # Initialize ontology manager
-        onto_mgr = OntologyManager("ontology/hospital.owl")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # The Ollama health check and model load don't depend on the ontology,
+            # so they run while the OWL file is parsed and the RAG index is built
+            llm_future = executor.submit(_start_llm_client)
+            
+            # Initialize ontology manager
+            onto_mgr = OntologyManager("ontology/hospital.owl")
+            
+            # Initialize conflict detector
+            conflict_detector = ConflictDetector(onto_mgr)
+            
+            # Initialize RAG retriever and warm the embedding model with the example questions
+            rag_retriever = RAGRetriever(onto_mgr)
+            rag_retriever.initialize(batch_size=64)
+            rag_retriever.warm_up(EXAMPLE_QUESTIONS)
+            
+            # Initialize LLM client
+            llm_client = llm_future.result()
         
-        # Initialize conflict detector
-        conflict_detector = ConflictDetector(onto_mgr)
+        # Initialize chat response cache
+        response_cache = ResponseCache(max_size=512, similarity_threshold=0.95)
         
-        # Initialize RAG retriever
-        rag_retriever = RAGRetriever(onto_mgr)
-        rag_retriever.initialize()
+        return onto_mgr, conflict_detector, rag_retriever, llm_client, response_cache, None
+    except Exception as e:
+        return None, None, None, None, None, str(e)
+
+@st.cache_resource
+def _qa_cache():
+    """Persistent QA cache shared across sessions and restarts"""
+    return DiskResponseCache(".cache/qa", expire=3600)
+
+@st.fragment
+def _tab_chat(rag_retriever, llm_client, response_cache, qa_cache):
+    """Chat Assistant tab; reruns independently of the rest of the page"""
+    st.header("Chat with Scheduling Assistant")
+    
+    # Example queries
+    with st.expander("💡 Example Questions"):
+        st.markdown(EXAMPLE_QUESTIONS_MD)
+    
+    # Display chat history
+    for message in st.session_state.chat_history:
+        with st.chat_message(message['role']):
+            st.write(message['content'])
+            
+            if 'sources' in message and message['sources']:
+                with st.expander("📚 View Sources"):
+                    for i, source_key in enumerate(message['sources'], 1):
+                        st.caption(f"{i}. {st.session_state.source_store.get(source_key, '')}...")
+    
+    # Chat input
+    user_query = st.chat_input("Ask about schedules, availability, conflicts...")
+    
+    if user_query:
+        # Add user message
+        st.session_state.chat_history.append({
+            'role': 'user',
+            'content': user_query
+        })
+        
+        with st.chat_message('user'):
+            st.write(user_query)
+        
+        # Generate response
+        with st.chat_message('assistant'):
+            # Exact match first (in memory, then on disk for this ontology version and model),
+            # then a near-duplicate question by embedding similarity
+            version = rag_retriever.onto_mgr.version
+            cached = response_cache.get(user_query, llm_client.model)
+            query_embedding = None
+            if cached is None:
+                persisted = qa_cache.get(user_query, version, llm_client.model)
+                if persisted is not None:
+                    cached = {'response': persisted[0], 'sources': persisted[1]}
+            if cached is None:
+                query_embedding = rag_retriever.embed(user_query)
+                cached = response_cache.get_similar(query_embedding, llm_client.model)
+            
+            if cached is not None:
+                response = cached['response']
+                sources = cached['sources']
+                st.write(response)
+            else:
+                # Make sure the model is resident while retrieval runs, so a model that
+                # Ollama unloaded after keep_alive expired reloads in parallel with RAG
+                llm_client.warmup(background=True)
+                
+                with st.spinner('🤔 Thinking...'):
+                    # Retrieve context
+                    context, context_str = _cached_context(user_query, 5, version,
+                                                           rag_retriever, query_embedding)
+                
+                # Stream LLM response token by token, with the last few turns as chat history
+                # (the current question is already the last history entry, so it is excluded)
+                messages = llm_client.build_chat_messages(
+                    prompt=user_query,
+                    context=context_str,
+                    system_prompt=SYSTEM_PROMPT,
+                    history=st.session_state.chat_history[:-1][-CHAT_CONTEXT_MESSAGES:]
+                )
+                stream_status = {}
+                response = st.write_stream(llm_client.stream_chat(messages, stream_status))
+                sources = context['sources']
+                
+                # A failed request streams its error text; never cache that as an answer
+                if 'error' not in stream_status:
+                    response_cache.put(user_query, llm_client.model, query_embedding, response, sources)
+                    qa_cache.put(user_query, version, llm_client.model, response, sources)
+            
+            if sources:
+                with st.expander("📚 View Sources"):
+                    for i, source in enumerate(sources[:3], 1):
+                        st.caption(f"{i}. {source[:200]}...")
+        
+        # Add to history once streaming has completed; sources are stored once as
+        # display previews and referenced by key to keep session state small
+        source_keys = []
+        for source in sources[:3]:
+            source_key = hash(source)
+            st.session_state.source_store.setdefault(source_key, source[:200])
+            source_keys.append(source_key)
+        
+        st.session_state.chat_history.append({
+            'role': 'assistant',
+            'content': response,
+            'sources': source_keys
+        })
+        _trim_chat_history()
+
+@st.fragment
+def _tab_conflicts(conflict_detector):
+    """Conflict Detection tab; reruns independently of the rest of the page"""
+    st.header("Conflict Detection & Analysis")
+    
+    st.markdown(CONFLICT_INTRO_MD)
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col2:
+        if st.button("🔍 Scan for Conflicts", type="primary"):
+            st.session_state.run_conflict_scan = True
+    
+    version = conflict_detector.onto_mgr.version
+    if st.session_state.get('run_conflict_scan', False):
+        # Clear the trigger before scanning so an interrupted render can't leave it set
+        st.session_state.run_conflict_scan = False
+        with st.spinner("🔄 Analyzing schedules..."):
+            st.session_state.last_conflicts = (version, _cached_conflicts(version, conflict_detector))
+    
+    # Re-display the last scan on later reruns as long as the schedule hasn't changed
+    last_scan = st.session_state.get('last_conflicts')
+    if last_scan and last_scan[0] == version:
+        conflicts = last_scan[1]
         
-        # Initialize LLM client
-        llm_client = OllamaClient(model="llama3.1:8b")  # Change model as needed
+        total_conflicts = sum(len(v) for v in conflicts.values())
         
-        return onto_mgr, conflict_detector, rag_retriever, llm_client, None
-    except Exception as e:
-        return None, None, None, None, str(e)
+        if total_conflicts == 0:
+            st.success("✅ No conflicts detected! All schedules are valid.")
+        else:
+            st.error(f"⚠️ Found {total_conflicts} conflict(s)")
+            
+            # Display conflicts by type
+            if conflicts.get('patient_conflicts'):
+                st.subheader("👤 Patient Double-Bookings (CRITICAL)")
+                for conflict in conflicts['patient_conflicts']:
+                    with st.expander(f"🚫 {conflict['patient']} - {conflict['severity']} SEVERITY", expanded=True):
+                        st.error(f"**Description:** {conflict['description']}")
+                        st.write(f"**Conflicting Surgeries:**")
+                        st.write(f"- {conflict['surgery1']}")
+                        st.write(f"- {conflict['surgery2']}")
+                        
+                        st.markdown("**💡 Suggested Resolution:**")
+                        st.info("IMMEDIATELY reschedule one surgery. A patient cannot be in two places at once.")
+
+            if conflicts.get('surgeon_conflicts'):
+                st.subheader("👨‍⚕️ Surgeon Double-Bookings")
+                for conflict in conflicts['surgeon_conflicts']:
+                    with st.expander(f"⚠️ {conflict['surgeon']} - {conflict['severity']} SEVERITY"):
+                        st.write(f"**Description:** {conflict['description']}")
+                        st.write(f"**Conflicting Surgeries:**")
+                        st.write(f"- {conflict['surgery1']}")
+                        st.write(f"- {conflict['surgery2']}")
+                        
+                        st.markdown("**💡 Suggested Resolution:**")
+                        st.info("Reschedule one surgery to a non-overlapping time slot or assign a different qualified surgeon.")
+            
+            if conflicts['theatre_conflicts']:
+                st.subheader("🏥 Theatre Double-Bookings")
+                for conflict in conflicts['theatre_conflicts']:
+                    with st.expander(f"⚠️ {conflict['theatre']} - {conflict['severity']} SEVERITY"):
+                        st.write(f"**Description:** {conflict['description']}")
+                        st.write(f"**Conflicting Surgeries:**")
+                        st.write(f"- {conflict['surgery1']}")
+                        st.write(f"- {conflict['surgery2']}")
+                        
+                        st.markdown("**💡 Suggested Resolution:**")
+                        st.info("Move one surgery to an available alternative theatre or adjust the time slots.")
+            
+            if conflicts['specialization_mismatches']:
+                st.subheader("🔍 Specialization Mismatches")
+                for conflict in conflicts['specialization_mismatches']:
+                    with st.expander(f"⚠️ {conflict['surgeon']} - {conflict['severity']} SEVERITY"):
+                        st.write(f"**Description:** {conflict['description']}")
+                        st.write(f"**Surgeon's Theatre:** {conflict['surgeon_theatre']}")
+                        st.write(f"**Required Theatre:** {conflict['required_theatre']}")
+                        
+                        st.markdown("**💡 Suggested Resolution:**")
+                        st.info("Assign a surgeon who specializes in this theatre type or relocate the surgery to the surgeon's specialized theatre.")
+
+@st.fragment
+def _tab_schedule_view(onto_mgr):
+    """Schedule View tab; reruns independently of the rest of the page"""
+    st.header("Current Schedules")
+    
+    view_type = st.selectbox("View by:", ["Surgeon", "Theatre", "All Timeslots"])
+    
+    if view_type == "Surgeon":
+        surgeon_names = _entity_names(onto_mgr.version, "Surgeon", onto_mgr)
+        
+        if surgeon_names:
+            selected = st.selectbox("Select Surgeon:", surgeon_names)
+            
+            if selected:
+                st.subheader(f"📅 Schedule for {selected}")
+                schedule = onto_mgr.get_surgeon_schedule(selected)
+                
+                if schedule:
+                    for item in schedule:
+                        with st.container():
+                            col1, col2, col3 = st.columns(3)
+                            col1.write(f"**{item['surgery']}**")
+                            col2.write(f"🕐 {item['start_time']} - {item['end_time']}")
+                            col3.write(f"🏥 {item['theatre']}")
+                            st.markdown("---")
+                else:
+                    st.info("No surgeries scheduled for this surgeon")
+        else:
+            st.warning("No surgeons found in the ontology")
+    
+    elif view_type == "Theatre":
+        theatre_names = _entity_names(onto_mgr.version, "Theatre", onto_mgr)
+        
+        if theatre_names:
+            selected = st.selectbox("Select Theatre:", theatre_names)
+            
+            if selected:
+                st.subheader(f"📅 Schedule for {selected}")
+                schedule = onto_mgr.get_theatre_schedule(selected)
+                
+                if schedule:
+                    for item in schedule:
+                        with st.container():
+                            col1, col2, col3 = st.columns(3)
+                            col1.write(f"**{item['surgery']}**")
+                            col2.write(f"👨‍⚕️ {item['surgeon']}")
+                            col3.write(f"🕐 {item['start_time']} - {item['end_time']}")
+                            st.markdown("---")
+                else:
+                    st.info("No surgeries scheduled in this theatre")
+        else:
+            st.warning("No theatres found in the ontology")
+    
+    elif view_type == "All Timeslots":
+        st.subheader("📅 All Scheduled Timeslots")
+        timeslots = _timeslot_labels(onto_mgr.version, onto_mgr)
+        by_ts = _surgeries_by_timeslot(onto_mgr.version, onto_mgr)
+        
+        if timeslots:
+            for label, ts_name in timeslots.items():
+                with st.expander(f"⏰ {label}"):
+                    # Find surgeries in this timeslot
+                    surgeries = by_ts.get(ts_name, [])
+                    
+                    if surgeries:
+                        for surgery in surgeries:
+                            col1, col2, col3 = st.columns(3)
+                            col1.write(f"**Surgery:** {surgery['surgery']}")
+                            col2.write(f"**Surgeon:** {surgery['surgeon']}")
+                            col3.write(f"**Theatre:** {surgery['theatre']}")
+                            
+                            st.markdown("---")
+                    else:
+                        st.info("No surgeries scheduled in this timeslot")
+        else:
+            st.warning("No timeslots found in the ontology")
+
+@st.fragment
+def _tab_add_schedule(onto_mgr, conflict_detector, rag_retriever, response_cache):
+    """Add Schedule tab; reruns independently of the rest of the page"""
+    st.header("➕ Add New Surgery Schedule")
+    
+    st.markdown("Fill in the details below to schedule a new surgery:")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Surgery Details")
+        
+        # Surgery Type Dropdown (instead of text input)
+        surgery_types = _entity_names(onto_mgr.version, "Surgery", onto_mgr)
+        
+        selected_surgery_type = st.selectbox(
+            "Surgery Type",
+            surgery_types,
+        )
+        
+        # Get available surgeons
+        surgeon_names = _entity_names(onto_mgr.version, "Surgeon", onto_mgr)
+        
+        if surgeon_names:
+            selected_surgeon = st.selectbox("Select Surgeon", surgeon_names)
+        else:
+            st.warning("No surgeons available")
+            selected_surgeon = None
+        
+        duration = st.number_input("Estimated Duration (minutes)", min_value=30, max_value=600, value=120, step=15)
+        
+        is_emergency = st.checkbox("Emergency Surgery", value=False)
+    
+    with col2:
+        st.subheader("Theatre & Time")
+        
+        # Get available theatres
+        theatre_names = _entity_names(onto_mgr.version, "Theatre", onto_mgr)
+        
+        if theatre_names:
+            selected_theatre = st.selectbox("Select Theatre", theatre_names)
+        else:
+            st.warning("No theatres available")
+            selected_theatre = None
+        
+        # Get available timeslots
+        timeslots = _timeslot_labels(onto_mgr.version, onto_mgr)
+        
+        if timeslots:
+            selected_timeslot_display = st.selectbox("Select Timeslot", list(timeslots))
+            selected_timeslot = timeslots[selected_timeslot_display]
+        else:
+            st.warning("No timeslots available")
+            selected_timeslot = None
+    
+    # Patient Information Section (NEW)
+    st.markdown("---")
+    st.subheader("👤 Patient Information")
+    
+    col3, col4 = st.columns(2)
+    
+    with col3:
+        patient_name = st.text_input(
+            "Patient Name",
+            placeholder="e.g., Patient_John_Doe",
+            help="Enter patient name using underscores instead of spaces"
+        )
+    
+    with col4:
+        # Severity Level Dropdown (NEW)
+        severity_levels = ["Severe", "Moderate", "Mild", "Minor"]
+        selected_severity = st.selectbox(
+            "Patient Severity Level",
+            severity_levels,
+            index=1,  # Default to "Moderate"
+            help="Select the severity level for this patient"
+        )
+    
+    # Additional patient details
+    col5, col6 = st.columns(2)
+    
+    with col5:
+        # Get available wards
+        ward_names = _entity_names(onto_mgr.version, "Ward", onto_mgr) or ["General_Ward"]
+        
+        selected_ward = st.selectbox(
+            "Admission Ward",
+            ward_names,
+            help="Select the ward where patient will be admitted"
+        )
+    
+    with col6:
+        # Get available recovery rooms
+        recovery_room_names = _entity_names(onto_mgr.version, "RecoveryRoom", onto_mgr) or ["Recovery_Room_A"]
+        
+        selected_recovery = st.selectbox(
+            "Recovery Room",
+            recovery_room_names,
+            help="Select the recovery room for post-operative care"
+        )
+    
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("✅ Add Surgery Schedule", type="primary"):
+            # Validation
+            if not selected_surgery_type:
+                st.error("Please select a surgery type")
+            elif not selected_surgeon:
+                st.error("Please select a surgeon")
+            elif not selected_theatre:
+                st.error("Please select a theatre")
+            elif not selected_timeslot:
+                st.error("Please select a timeslot")
+            elif not patient_name:
+                st.error("Please enter a patient name")
+            else:
+                # Check for conflicts before adding (only surgeries in overlapping timeslots)
+                clashes = conflict_detector.check_new_surgery(
+                    selected_surgeon, selected_theatre, selected_timeslot,
+                    exclude_surgery=selected_surgery_type
+                )
+                for clash in clashes:
+                    st.warning(f"⚠️ {clash['type']}: {clash['description']}")
+                
+                with st.spinner("Creating surgery schedule..."):
+                    try:
+                        # Add the surgery
+                        success = onto_mgr.add_surgery(
+                            name=selected_surgery_type,
+                            surgeon_name=selected_surgeon,
+                            theatre_name=selected_theatre,
+                            timeslot_name=selected_timeslot,
+                            duration=duration,
+                            is_emergency=is_emergency
+                        )
+                        
+                        if success:
+                            # Add patient with all details
+                            with onto_mgr.onto:
+                                # Create patient
+                                patient = onto_mgr.onto.Patient(patient_name)
+                                
+                                # Find severity instance
+                                severity_instance = onto_mgr.severity_by_level.get(selected_severity)
+                                if severity_instance:
+                                    patient.has_severity = [severity_instance]
+                                
+                                # Find ward
+                                ward_instance = onto_mgr.get_entity(selected_ward)
+                                if ward_instance:
+                                    patient.admitted_to = [ward_instance]
+                                
+                                # Find recovery room
+                                recovery_instance = onto_mgr.get_entity(selected_recovery)
+                                if recovery_instance:
+                                    patient.assigned_to_recovery = [recovery_instance]
+                                
+                                # Link patient to surgery
+                                surgery_instance = onto_mgr.get_entity(selected_surgery_type)
+                                if surgery_instance:
+                                    patient.undergoes_surgery = [surgery_instance]
+                            
+                            # Save changes
+                            onto_mgr.save()
+                            
+                            st.success(f"✅ Surgery schedule created successfully!")
+                            st.success(f"   • Surgery: **{selected_surgery_type}**")
+                            st.success(f"   • Patient: **{patient_name}** (Severity: {selected_severity})")
+                            st.success(f"   • Surgeon: **{selected_surgeon}**")
+                            st.success(f"   • Theatre: **{selected_theatre}**")
+                            st.success(f"   • Time: **{selected_timeslot}**")
+                            
+                            st.info("💡 Tip: Go to 'Conflict Detection' tab to verify no conflicts exist")
+                            
+                            _refresh_after_schedule_change(rag_retriever, response_cache)
+                        else:
+                            st.error("❌ Failed to add surgery. Check logs for details.")
+                    
+                    except Exception as e:
+                        st.error(f"❌ Error creating schedule: {str(e)}")
+                        st.exception(e)
+    
+    with col2:
+        if st.button("🔍 Preview Conflicts"):
+            if selected_surgeon and selected_timeslot:
+                with st.spinner("Checking for potential conflicts..."):
+                    # Stop at the first conflict; the full breakdown lives in the Conflict Detection tab
+                    first_conflict = next(conflict_detector.detect_any_conflict(), None)
+                    
+                    if first_conflict is None:
+                        st.success("✅ No conflicts detected with current schedules!")
+                    else:
+                        st.warning(f"⚠️ Potential conflict found ({first_conflict['type']})")
+                        st.error(first_conflict['description'])
+                        st.info("💡 Run a full scan in the 'Conflict Detection' tab to see all conflicts")
+            else:
+                st.warning("Fill in surgeon and timeslot first")
+    
+    with col3:
+        if st.button("🔄 Reset Form"):
+            st.rerun()
+
+@st.fragment
+def _tab_delete_schedule(onto_mgr, rag_retriever, response_cache):
+    """Delete Schedule tab; reruns independently of the rest of the page"""
+    st.header("🗑️ Delete Surgery Schedules")
+    
+    st.warning("⚠️ **Warning:** Deleting a schedule will permanently remove the surgery and associated patient data from the ontology.")
+    
+    # Delete options
+    delete_option = st.radio(
+        "Select deletion method:",
+        ["Delete Specific Surgery", "Delete by Surgeon", "Delete by Timeslot", "Delete All Schedules"],
+        horizontal=False
+    )
+    
+    st.markdown("---")
+    
+    if delete_option == "Delete Specific Surgery":
+        st.subheader("🔍 Delete a Specific Surgery")
+        
+        # Get all surgeries
+        surgery_names = _entity_names(onto_mgr.version, "Surgery", onto_mgr)
+        
+        if surgery_names:
+            selected_surgery = st.selectbox("Select Surgery to Delete:", surgery_names)
+            
+            # Show surgery details
+            if selected_surgery:
+                st.markdown("### 📋 Surgery Details")
+                info = onto_mgr.get_schedule_info(selected_surgery)
+                
+                if info:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"**Surgery:** {info['surgery_name']}")
+                        st.write(f"**Surgeon:** {info['surgeon']}")
+                        st.write(f"**Theatre:** {info['theatre']}")
+                        st.write(f"**Time:** {info['start_time']} - {info['end_time']}")
+                    with col2:
+                        st.write(f"**Patient:** {info['patient_name']}")
+                        st.write(f"**Ward:** {info['patient_ward']}")
+                        st.write(f"**Recovery Room:** {info['recovery_room']}")
+                        st.write(f"**Emergency:** {'Yes' if info['is_emergency'] else 'No'}")
+                
+                st.markdown("---")
+                
+                col1, col2 = st.columns([1, 3])
+                with col1:
+                    if st.button("🗑️ Delete Surgery", type="primary", key="delete_single"):
+                        with st.spinner("Deleting surgery..."):
+                            success = onto_mgr.delete_surgery(selected_surgery)
+                            if success:
+                                st.success(f"✅ Successfully deleted surgery '{selected_surgery}'")
+                                st.info("💡 Refreshing data...")
+                                _refresh_after_schedule_change(rag_retriever, response_cache)
+                                st.rerun()
+                            else:
+                                st.error("❌ Failed to delete surgery")
+        else:
+            st.info("No surgeries found in the system")
+    
+    elif delete_option == "Delete by Surgeon":
+        st.subheader("👨‍⚕️ Delete All Surgeries by Surgeon")
+        
+        surgeon_names = _entity_names(onto_mgr.version, "Surgeon", onto_mgr)
+        
+        if surgeon_names:
+            selected_surgeon = st.selectbox("Select Surgeon:", surgeon_names)
+            
+            # Show surgeon's schedule
+            if selected_surgeon:
+                st.markdown("### 📅 Surgeon's Current Schedule")
+                schedule = onto_mgr.get_surgeon_schedule(selected_surgeon)
+                
+                if schedule:
+                    for item in schedule:
+                        with st.container():
+                            col1, col2, col3 = st.columns(3)
+                            col1.write(f"**{item['surgery']}**")
+                            col2.write(f"🕐 {item['start_time']} - {item['end_time']}")
+                            col3.write(f"🏥 {item['theatre']}")
+                            st.markdown("---")
+                    
+                    st.warning(f"⚠️ This will delete **{len(schedule)} surgery(ies)** and associated patient data")
+                    
+                    col1, col2 = st.columns([1, 3])
+                    with col1:
+                        if st.button("🗑️ Delete All", type="primary", key="delete_surgeon"):
+                            with st.spinner(f"Deleting schedules for {selected_surgeon}..."):
+                                success = onto_mgr.delete_schedule_by_surgeon(selected_surgeon)
+                                if success:
+                                    st.success(f"✅ Successfully deleted all schedules for '{selected_surgeon}'")
+                                    _refresh_after_schedule_change(rag_retriever, response_cache)
+                                    st.rerun()
+                                else:
+                                    st.error("❌ Failed to delete schedules")
+                else:
+                    st.info(f"No surgeries scheduled for {selected_surgeon}")
+        else:
+            st.info("No surgeons found in the system")
+    
+    elif delete_option == "Delete by Timeslot":
+        st.subheader("⏰ Delete All Surgeries in a Timeslot")
+        
+        timeslots = _timeslot_labels(onto_mgr.version, onto_mgr)
+        
+        if timeslots:
+            selected_timeslot_display = st.selectbox("Select Timeslot:", list(timeslots))
+            selected_timeslot = timeslots[selected_timeslot_display]
+            
+            # Show surgeries in this timeslot
+            if selected_timeslot:
+                st.markdown("### 📋 Surgeries in This Timeslot")
+                surgeries_in_slot = _surgeries_by_timeslot(onto_mgr.version, onto_mgr).get(selected_timeslot, [])
+                
+                if surgeries_in_slot:
+                    for surgery in surgeries_in_slot:
+                        with st.container():
+                            col1, col2, col3 = st.columns(3)
+                            col1.write(f"**{surgery['surgery']}**")
+                            col2.write(f"👨‍⚕️ {surgery['surgeon']}")
+                            col3.write(f"🏥 {surgery['theatre']}")
+                            st.markdown("---")
+                    
+                    st.warning(f"⚠️ This will delete **{len(surgeries_in_slot)} surgery(ies)** and associated patient data")
+                    
+                    col1, col2 = st.columns([1, 3])
+                    with col1:
+                        if st.button("🗑️ Delete All", type="primary", key="delete_timeslot"):
+                            with st.spinner(f"Deleting schedules in timeslot..."):
+                                success = onto_mgr.delete_schedule_by_timeslot(selected_timeslot)
+                                if success:
+                                    st.success(f"✅ Successfully deleted all schedules in timeslot")
+                                    _refresh_after_schedule_change(rag_retriever, response_cache)
+                                    st.rerun()
+                                else:
+                                    st.error("❌ Failed to delete schedules")
+                else:
+                    st.info(f"No surgeries scheduled in this timeslot")
+        else:
+            st.info("No timeslots found in the system")
+    
+    elif delete_option == "Delete All Schedules":
+        st.subheader("⚠️ Delete ALL Schedules")
+        
+        st.error("🚨 **DANGER ZONE** 🚨")
+        st.warning("This will permanently delete ALL surgeries and patients from the system!")
+        
+        # Show current statistics
+        summary = _ontology_summary(onto_mgr.version, onto_mgr)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total Surgeries", summary['surgeries'])
+        with col2:
+            st.metric("Total Patients", summary['patients'])
+        
+        st.markdown("---")
+        
+        # Confirmation checkbox
+        confirm = st.checkbox("I understand this action cannot be undone")
+        
+        if confirm:
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                if st.button("🗑️ DELETE ALL", type="primary", key="delete_all"):
+                    with st.spinner("Deleting all schedules..."):
+                        success = onto_mgr.delete_all_schedules()
+                        if success:
+                            st.success("✅ Successfully deleted all schedules")
+                            _refresh_after_schedule_change(rag_retriever, response_cache)
+                            st.rerun()
+                        else:
+                            st.error("❌ Failed to delete schedules")
+        else:
+            st.info("👆 Check the box above to enable deletion")
 
 # Main app
 def main():
+    # Initialize system before rendering anything so the sidebar and tabs
+    # only deal with already-resolved components
+    onto_mgr, conflict_detector, rag_retriever, llm_client, response_cache, error = initialize_system()
+    
+    if error:
+        st.error(f"❌ Initialization Error: {error}")
+        st.stop()
+    
     # Sidebar
     with st.sidebar:
         st.title("🏥 Hospital System")
         st.markdown("---")
         
-        # Initialize system
-        onto_mgr, conflict_detector, rag_retriever, llm_client, error = initialize_system()
-        
-        if error:
-            st.error(f"❌ Initialization Error: {error}")
-            st.stop()
-        
         # System status
         st.subheader("📊 System Status")
-        summary = onto_mgr.get_ontology_summary()
+        summary = _ontology_summary(onto_mgr.version, onto_mgr)
         
         col1, col2 = st.columns(2)
         with col1:
@@ -89,21 +850,39 @@ def main():
         # Quick actions
         st.subheader("⚡ Quick Actions")
         if st.button("🔄 Refresh Data"):
+            st.cache_data.clear()
+            _refresh_after_schedule_change(rag_retriever, response_cache)
+            st.rerun()
+        
+        if st.button("♻️ Full Reload", help="Reload the ontology, embedding model and LLM client from scratch"):
+            st.cache_data.clear()
             st.cache_resource.clear()
             st.rerun()
         
-        if st.button("🔍 Run Conflict Scan"):
-            st.session_state.run_conflict_scan = True
+        if st.button("🧹 Clear QA cache"):
+            response_cache.clear()
+            _qa_cache().clear()
+            st.success("QA cache cleared")
+        
+        st.caption("Run conflict scans from the 'Conflict Detection' tab")
         
         st.markdown("---")
         
         # LLM Model Selection
         st.subheader("🤖 LLM Settings")
-        available_models = ["llama3.1:8b", "mistral", "phi3:mini", "llama2", "qwen:1.8b"]
-        selected_model = st.selectbox("Model:", available_models, index=0)
+        # Only offer models Ollama has pulled, so a typo'd tag can't sit on the request timeout
+        available_models = _available_models(llm_client) or [llm_client.model]
+        selected_model = st.selectbox(
+            "Model:", available_models,
+            index=available_models.index(llm_client.model) if llm_client.model in available_models else 0,
+            help="q4_K_M: 4-bit weights, fastest and smallest (default). "
+                 "q5_K_M: 5-bit weights, slightly better quality, ~15% slower. "
+                 "Untagged models use whatever quantization Ollama ships as the default tag."
+        )
         
         if selected_model != llm_client.model:
             llm_client.model = selected_model
+            llm_client.warmup(background=True)
             st.info(f"Switched to {selected_model}")
     
     # Main content
@@ -121,615 +900,23 @@ def main():
     
     # TAB 1: Chat Assistant
     with tab1:
-        st.header("Chat with Scheduling Assistant")
-        
-        # Example queries
-        with st.expander("💡 Example Questions"):
-            st.markdown("""
-            - Is Dr. Smith available at 9 AM?
-            - Which surgeons specialize in cardiology?
-            - Show me all surgeries scheduled for today
-            - Are there any conflicts in the current schedule?
-            - Suggest a time slot for an emergency brain surgery
-            """)
-        
-        # Display chat history
-        for message in st.session_state.chat_history:
-            with st.chat_message(message['role']):
-                st.write(message['content'])
-                
-                if 'sources' in message and message['sources']:
-                    with st.expander("📚 View Sources"):
-                        for i, source in enumerate(message['sources'][:3], 1):
-                            st.caption(f"{i}. {source[:200]}...")
-        
-        # Chat input
-        user_query = st.chat_input("Ask about schedules, availability, conflicts...")
-        
-        if user_query:
-            # Add user message
-            st.session_state.chat_history.append({
-                'role': 'user',
-                'content': user_query
-            })
-            
-            with st.chat_message('user'):
-                st.write(user_query)
-            
-            # Generate response
-            with st.chat_message('assistant'):
-                with st.spinner('🤔 Thinking...'):
-                    # Retrieve context
-                    context = rag_retriever.retrieve_context(user_query, top_k=5)
-                    context_str = rag_retriever.get_formatted_context(context)
-                    
-                    # Generate LLM response
-                    response = llm_client.generate(
-                        prompt=user_query,
-                        context=context_str,
-                        system_prompt=SYSTEM_PROMPT
-                    )
-                    
-                    st.write(response)
-                    
-                    # Add to history
-                    st.session_state.chat_history.append({
-                        'role': 'assistant',
-                        'content': response,
-                        'sources': context['sources']
-                    })
-            
-            # Rerun to update chat display
-            st.rerun()
+        _tab_chat(rag_retriever, llm_client, response_cache, _qa_cache())
     
     # TAB 2: Conflict Detection
     with tab2:
-        st.header("Conflict Detection & Analysis")
-        
-        st.markdown("""
-        This system automatically detects:
-        - 👨‍⚕️ **Surgeon Double-Bookings**: Same surgeon scheduled for multiple surgeries at overlapping times
-        - 🏥 **Theatre Conflicts**: Same theatre booked for multiple surgeries simultaneously
-        - 🔍 **Specialization Mismatches**: Surgeons operating in theatres outside their specialization
-        """)
-        
-        col1, col2 = st.columns([2, 1])
-        
-        with col2:
-            if st.button("🔍 Scan for Conflicts", type="primary"):
-                st.session_state.run_conflict_scan = True
-        
-        if st.session_state.get('run_conflict_scan', False):
-            with st.spinner("🔄 Analyzing schedules..."):
-                conflicts = conflict_detector.detect_all_conflicts()
-                
-                total_conflicts = sum(len(v) for v in conflicts.values())
-                
-                if total_conflicts == 0:
-                    st.success("✅ No conflicts detected! All schedules are valid.")
-                else:
-                    st.error(f"⚠️ Found {total_conflicts} conflict(s)")
-                    
-                    # Display conflicts by type
-                    if conflicts.get('patient_conflicts'):
-                        st.subheader("👤 Patient Double-Bookings (CRITICAL)")
-                        for conflict in conflicts['patient_conflicts']:
-                            with st.expander(f"🚫 {conflict['patient']} - {conflict['severity']} SEVERITY", expanded=True):
-                                st.error(f"**Description:** {conflict['description']}")
-                                st.write(f"**Conflicting Surgeries:**")
-                                st.write(f"- {conflict['surgery1']}")
-                                st.write(f"- {conflict['surgery2']}")
-                                
-                                st.markdown("**💡 Suggested Resolution:**")
-                                st.info("IMMEDIATELY reschedule one surgery. A patient cannot be in two places at once.")
-
-                    if conflicts.get('surgeon_conflicts'):
-                        st.subheader("👨‍⚕️ Surgeon Double-Bookings")
-                        for conflict in conflicts['surgeon_conflicts']:
-                            with st.expander(f"⚠️ {conflict['surgeon']} - {conflict['severity']} SEVERITY"):
-                                st.write(f"**Description:** {conflict['description']}")
-                                st.write(f"**Conflicting Surgeries:**")
-                                st.write(f"- {conflict['surgery1']}")
-                                st.write(f"- {conflict['surgery2']}")
-                                
-                                st.markdown("**💡 Suggested Resolution:**")
-                                st.info("Reschedule one surgery to a non-overlapping time slot or assign a different qualified surgeon.")
-                    
-                    if conflicts['theatre_conflicts']:
-                        st.subheader("🏥 Theatre Double-Bookings")
-                        for conflict in conflicts['theatre_conflicts']:
-                            with st.expander(f"⚠️ {conflict['theatre']} - {conflict['severity']} SEVERITY"):
-                                st.write(f"**Description:** {conflict['description']}")
-                                st.write(f"**Conflicting Surgeries:**")
-                                st.write(f"- {conflict['surgery1']}")
-                                st.write(f"- {conflict['surgery2']}")
-                                
-                                st.markdown("**💡 Suggested Resolution:**")
-                                st.info("Move one surgery to an available alternative theatre or adjust the time slots.")
-                    
-                    if conflicts['specialization_mismatches']:
-                        st.subheader("🔍 Specialization Mismatches")
-                        for conflict in conflicts['specialization_mismatches']:
-                            with st.expander(f"⚠️ {conflict['surgeon']} - {conflict['severity']} SEVERITY"):
-                                st.write(f"**Description:** {conflict['description']}")
-                                st.write(f"**Surgeon's Theatre:** {conflict['surgeon_theatre']}")
-                                st.write(f"**Required Theatre:** {conflict['required_theatre']}")
-                                
-                                st.markdown("**💡 Suggested Resolution:**")
-                                st.info("Assign a surgeon who specializes in this theatre type or relocate the surgery to the surgeon's specialized theatre.")
-            
-            st.session_state.run_conflict_scan = False
+        _tab_conflicts(conflict_detector)
     
     # TAB 3: Schedule View
     with tab3:
-        st.header("Current Schedules")
-        
-        view_type = st.selectbox("View by:", ["Surgeon", "Theatre", "All Timeslots"])
-        
-        if view_type == "Surgeon":
-            surgeons = onto_mgr.get_all_surgeons()
-            surgeon_names = [s.name for s in surgeons]
-            
-            if surgeon_names:
-                selected = st.selectbox("Select Surgeon:", surgeon_names)
-                
-                if selected:
-                    st.subheader(f"📅 Schedule for {selected}")
-                    schedule = onto_mgr.get_surgeon_schedule(selected)
-                    
-                    if schedule:
-                        for item in schedule:
-                            with st.container():
-                                col1, col2, col3 = st.columns(3)
-                                col1.write(f"**{item['surgery']}**")
-                                col2.write(f"🕐 {item['start_time']} - {item['end_time']}")
-                                col3.write(f"🏥 {item['theatre']}")
-                                st.markdown("---")
-                    else:
-                        st.info("No surgeries scheduled for this surgeon")
-            else:
-                st.warning("No surgeons found in the ontology")
-        
-        elif view_type == "Theatre":
-            theatres = onto_mgr.get_all_theatres()
-            theatre_names = [t.name for t in theatres]
-            
-            if theatre_names:
-                selected = st.selectbox("Select Theatre:", theatre_names)
-                
-                if selected:
-                    st.subheader(f"📅 Schedule for {selected}")
-                    schedule = onto_mgr.get_theatre_schedule(selected)
-                    
-                    if schedule:
-                        for item in schedule:
-                            with st.container():
-                                col1, col2, col3 = st.columns(3)
-                                col1.write(f"**{item['surgery']}**")
-                                col2.write(f"👨‍⚕️ {item['surgeon']}")
-                                col3.write(f"🕐 {item['start_time']} - {item['end_time']}")
-                                st.markdown("---")
-                    else:
-                        st.info("No surgeries scheduled in this theatre")
-            else:
-                st.warning("No theatres found in the ontology")
-        
-        elif view_type == "All Timeslots":
-            st.subheader("📅 All Scheduled Timeslots")
-            timeslots = onto_mgr.get_all_timeslots()
-            
-            if timeslots:
-                for ts in timeslots:
-                    with st.expander(f"⏰ {ts.name} ({_get_value(ts.start_time, 'N/A')} - {_get_value(ts.end_time, 'N/A')})"):
-                        # Find surgeries in this timeslot
-                        surgeries = [s for s in onto_mgr.get_all_surgeries() 
-                                   if s.has_timeslot and _get_value(s.has_timeslot) == ts]
-                        
-                        if surgeries:
-                            for surgery in surgeries:
-                                col1, col2, col3 = st.columns(3)
-                                col1.write(f"**Surgery:** {surgery.name}")
-                                
-                                surgeon = _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A'
-                                col2.write(f"**Surgeon:** {surgeon}")
-                                
-                                theatre = _get_value(surgery.requires_theatre_type).name if surgery.requires_theatre_type else 'N/A'
-                                col3.write(f"**Theatre:** {theatre}")
-                                
-                                st.markdown("---")
-                        else:
-                            st.info("No surgeries scheduled in this timeslot")
-            else:
-                st.warning("No timeslots found in the ontology")
+        _tab_schedule_view(onto_mgr)
     
     # TAB 4: Add Schedule
     with tab4:
-        st.header("➕ Add New Surgery Schedule")
-        
-        st.markdown("Fill in the details below to schedule a new surgery:")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Surgery Details")
-            
-            # Surgery Type Dropdown (instead of text input)
-            surgery_types = [s.name for s in onto_mgr.get_all_surgeries()]
-            
-            selected_surgery_type = st.selectbox(
-                "Surgery Type",
-                surgery_types,
-            )
-            
-            # Get available surgeons
-            surgeons = onto_mgr.get_all_surgeons()
-            surgeon_names = [s.name for s in surgeons]
-            
-            if surgeon_names:
-                selected_surgeon = st.selectbox("Select Surgeon", surgeon_names)
-            else:
-                st.warning("No surgeons available")
-                selected_surgeon = None
-            
-            duration = st.number_input("Estimated Duration (minutes)", min_value=30, max_value=600, value=120, step=15)
-            
-            is_emergency = st.checkbox("Emergency Surgery", value=False)
-        
-        with col2:
-            st.subheader("Theatre & Time")
-            
-            # Get available theatres
-            theatres = onto_mgr.get_all_theatres()
-            theatre_names = [t.name for t in theatres]
-            
-            if theatre_names:
-                selected_theatre = st.selectbox("Select Theatre", theatre_names)
-            else:
-                st.warning("No theatres available")
-                selected_theatre = None
-            
-            # Get available timeslots
-            timeslots = onto_mgr.get_all_timeslots()
-            timeslot_names = [f"{ts.name} ({_get_value(ts.start_time, 'N/A')} - {_get_value(ts.end_time, 'N/A')})" 
-                             for ts in timeslots]
-            
-            if timeslot_names:
-                selected_timeslot_display = st.selectbox("Select Timeslot", timeslot_names)
-                selected_timeslot = timeslots[timeslot_names.index(selected_timeslot_display)].name
-            else:
-                st.warning("No timeslots available")
-                selected_timeslot = None
-        
-        # Patient Information Section (NEW)
-        st.markdown("---")
-        st.subheader("👤 Patient Information")
-        
-        col3, col4 = st.columns(2)
-        
-        with col3:
-            patient_name = st.text_input(
-                "Patient Name",
-                placeholder="e.g., Patient_John_Doe",
-                help="Enter patient name using underscores instead of spaces"
-            )
-        
-        with col4:
-            # Severity Level Dropdown (NEW)
-            severity_levels = ["Severe", "Moderate", "Mild", "Minor"]
-            selected_severity = st.selectbox(
-                "Patient Severity Level",
-                severity_levels,
-                index=1,  # Default to "Moderate"
-                help="Select the severity level for this patient"
-            )
-        
-        # Additional patient details
-        col5, col6 = st.columns(2)
-        
-        with col5:
-            # Get available wards
-            wards = list(onto_mgr.onto.Ward.instances())
-            ward_names = [w.name for w in wards] if wards else ["General_Ward"]
-            
-            selected_ward = st.selectbox(
-                "Admission Ward",
-                ward_names,
-                help="Select the ward where patient will be admitted"
-            )
-        
-        with col6:
-            # Get available recovery rooms
-            recovery_rooms = list(onto_mgr.onto.RecoveryRoom.instances())
-            recovery_room_names = [r.name for r in recovery_rooms] if recovery_rooms else ["Recovery_Room_A"]
-            
-            selected_recovery = st.selectbox(
-                "Recovery Room",
-                recovery_room_names,
-                help="Select the recovery room for post-operative care"
-            )
-        
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("✅ Add Surgery Schedule", type="primary"):
-                # Validation
-                if not selected_surgery_type:
-                    st.error("Please select a surgery type")
-                elif not selected_surgeon:
-                    st.error("Please select a surgeon")
-                elif not selected_theatre:
-                    st.error("Please select a theatre")
-                elif not selected_timeslot:
-                    st.error("Please select a timeslot")
-                elif not patient_name:
-                    st.error("Please enter a patient name")
-                else:
-                    # Check for conflicts before adding
-                    with st.spinner("Creating surgery schedule..."):
-                        try:
-                            # Add the surgery
-                            success = onto_mgr.add_surgery(
-                                name=selected_surgery_type,
-                                surgeon_name=selected_surgeon,
-                                theatre_name=selected_theatre,
-                                timeslot_name=selected_timeslot,
-                                duration=duration,
-                                is_emergency=is_emergency
-                            )
-                            
-                            if success:
-                                # Add patient with all details
-                                with onto_mgr.onto:
-                                    # Create patient
-                                    patient = onto_mgr.onto.Patient(patient_name)
-                                    
-                                    # Find severity instance
-                                    severity_instance = onto_mgr.onto.search_one(iri=f"*{selected_severity}")
-                                    if severity_instance:
-                                        patient.has_severity = [severity_instance]
-                                    
-                                    # Find ward
-                                    ward_instance = onto_mgr.onto.search_one(iri=f"*{selected_ward}")
-                                    if ward_instance:
-                                        patient.admitted_to = [ward_instance]
-                                    
-                                    # Find recovery room
-                                    recovery_instance = onto_mgr.onto.search_one(iri=f"*{selected_recovery}")
-                                    if recovery_instance:
-                                        patient.assigned_to_recovery = [recovery_instance]
-                                    
-                                    # Link patient to surgery
-                                    surgery_instance = onto_mgr.onto.search_one(iri=f"*{selected_surgery_type}")
-                                    if surgery_instance:
-                                        patient.undergoes_surgery = [surgery_instance]
-                                
-                                # Save changes
-                                onto_mgr.save()
-                                
-                                st.success(f"✅ Surgery schedule created successfully!")
-                                st.success(f"   • Surgery: **{selected_surgery_type}**")
-                                st.success(f"   • Patient: **{patient_name}** (Severity: {selected_severity})")
-                                st.success(f"   • Surgeon: **{selected_surgeon}**")
-                                st.success(f"   • Theatre: **{selected_theatre}**")
-                                st.success(f"   • Time: **{selected_timeslot}**")
-                                
-                                st.info("💡 Tip: Go to 'Conflict Detection' tab to verify no conflicts exist")
-                                
-                                # Clear cache to reload data
-                                st.cache_resource.clear()
-                            else:
-                                st.error("❌ Failed to add surgery. Check logs for details.")
-                        
-                        except Exception as e:
-                            st.error(f"❌ Error creating schedule: {str(e)}")
-                            st.exception(e)
-        
-        with col2:
-            if st.button("🔍 Preview Conflicts"):
-                if selected_surgeon and selected_timeslot:
-                    with st.spinner("Checking for potential conflicts..."):
-                        conflicts = conflict_detector.detect_all_conflicts()
-                        
-                        total_conflicts = sum(len(v) for v in conflicts.values())
-                        
-                        if total_conflicts == 0:
-                            st.success("✅ No conflicts detected with current schedules!")
-                        else:
-                            st.warning(f"⚠️ Found {total_conflicts} potential conflict(s)")
-                            
-                            if conflicts['surgeon_conflicts']:
-                                st.error(f"👨‍⚕️ Surgeon conflicts: {len(conflicts['surgeon_conflicts'])}")
-                            if conflicts['theatre_conflicts']:
-                                st.error(f"🏥 Theatre conflicts: {len(conflicts['theatre_conflicts'])}")
-                else:
-                    st.warning("Fill in surgeon and timeslot first")
-        
-        with col3:
-            if st.button("🔄 Reset Form"):
-                st.rerun()
+        _tab_add_schedule(onto_mgr, conflict_detector, rag_retriever, response_cache)
     
     # TAB 5: Delete Schedule
     with tab5:
-        st.header("🗑️ Delete Surgery Schedules")
-        
-        st.warning("⚠️ **Warning:** Deleting a schedule will permanently remove the surgery and associated patient data from the ontology.")
-        
-        # Delete options
-        delete_option = st.radio(
-            "Select deletion method:",
-            ["Delete Specific Surgery", "Delete by Surgeon", "Delete by Timeslot", "Delete All Schedules"],
-            horizontal=False
-        )
-        
-        st.markdown("---")
-        
-        if delete_option == "Delete Specific Surgery":
-            st.subheader("🔍 Delete a Specific Surgery")
-            
-            # Get all surgeries
-            surgeries = onto_mgr.get_all_surgeries()
-            surgery_names = [s.name for s in surgeries]
-            
-            if surgery_names:
-                selected_surgery = st.selectbox("Select Surgery to Delete:", surgery_names)
-                
-                # Show surgery details
-                if selected_surgery:
-                    st.markdown("### 📋 Surgery Details")
-                    info = onto_mgr.get_schedule_info(selected_surgery)
-                    
-                    if info:
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write(f"**Surgery:** {info['surgery_name']}")
-                            st.write(f"**Surgeon:** {info['surgeon']}")
-                            st.write(f"**Theatre:** {info['theatre']}")
-                            st.write(f"**Time:** {info['start_time']} - {info['end_time']}")
-                        with col2:
-                            st.write(f"**Patient:** {info['patient_name']}")
-                            st.write(f"**Ward:** {info['patient_ward']}")
-                            st.write(f"**Recovery Room:** {info['recovery_room']}")
-                            st.write(f"**Emergency:** {'Yes' if info['is_emergency'] else 'No'}")
-                    
-                    st.markdown("---")
-                    
-                    col1, col2 = st.columns([1, 3])
-                    with col1:
-                        if st.button("🗑️ Delete Surgery", type="primary", key="delete_single"):
-                            with st.spinner("Deleting surgery..."):
-                                success = onto_mgr.delete_surgery(selected_surgery)
-                                if success:
-                                    st.success(f"✅ Successfully deleted surgery '{selected_surgery}'")
-                                    st.info("💡 Refreshing data...")
-                                    st.cache_resource.clear()
-                                    st.rerun()
-                                else:
-                                    st.error("❌ Failed to delete surgery")
-            else:
-                st.info("No surgeries found in the system")
-        
-        elif delete_option == "Delete by Surgeon":
-            st.subheader("👨‍⚕️ Delete All Surgeries by Surgeon")
-            
-            surgeons = onto_mgr.get_all_surgeons()
-            surgeon_names = [s.name for s in surgeons]
-            
-            if surgeon_names:
-                selected_surgeon = st.selectbox("Select Surgeon:", surgeon_names)
-                
-                # Show surgeon's schedule
-                if selected_surgeon:
-                    st.markdown("### 📅 Surgeon's Current Schedule")
-                    schedule = onto_mgr.get_surgeon_schedule(selected_surgeon)
-                    
-                    if schedule:
-                        for item in schedule:
-                            with st.container():
-                                col1, col2, col3 = st.columns(3)
-                                col1.write(f"**{item['surgery']}**")
-                                col2.write(f"🕐 {item['start_time']} - {item['end_time']}")
-                                col3.write(f"🏥 {item['theatre']}")
-                                st.markdown("---")
-                        
-                        st.warning(f"⚠️ This will delete **{len(schedule)} surgery(ies)** and associated patient data")
-                        
-                        col1, col2 = st.columns([1, 3])
-                        with col1:
-                            if st.button("🗑️ Delete All", type="primary", key="delete_surgeon"):
-                                with st.spinner(f"Deleting schedules for {selected_surgeon}..."):
-                                    success = onto_mgr.delete_schedule_by_surgeon(selected_surgeon)
-                                    if success:
-                                        st.success(f"✅ Successfully deleted all schedules for '{selected_surgeon}'")
-                                        st.cache_resource.clear()
-                                        st.rerun()
-                                    else:
-                                        st.error("❌ Failed to delete schedules")
-                    else:
-                        st.info(f"No surgeries scheduled for {selected_surgeon}")
-            else:
-                st.info("No surgeons found in the system")
-        
-        elif delete_option == "Delete by Timeslot":
-            st.subheader("⏰ Delete All Surgeries in a Timeslot")
-            
-            timeslots = onto_mgr.get_all_timeslots()
-            timeslot_names = [f"{ts.name} ({_get_value(ts.start_time, 'N/A')} - {_get_value(ts.end_time, 'N/A')})" 
-                             for ts in timeslots]
-            
-            if timeslot_names:
-                selected_timeslot_display = st.selectbox("Select Timeslot:", timeslot_names)
-                selected_timeslot = timeslots[timeslot_names.index(selected_timeslot_display)].name
-                
-                # Show surgeries in this timeslot
-                if selected_timeslot:
-                    st.markdown("### 📋 Surgeries in This Timeslot")
-                    surgeries_in_slot = [s for s in onto_mgr.get_all_surgeries() 
-                                        if s.has_timeslot and _get_value(s.has_timeslot).name == selected_timeslot]
-                    
-                    if surgeries_in_slot:
-                        for surgery in surgeries_in_slot:
-                            with st.container():
-                                col1, col2, col3 = st.columns(3)
-                                col1.write(f"**{surgery.name}**")
-                                surgeon = _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A'
-                                col2.write(f"👨‍⚕️ {surgeon}")
-                                theatre = _get_value(surgery.requires_theatre_type).name if surgery.requires_theatre_type else 'N/A'
-                                col3.write(f"🏥 {theatre}")
-                                st.markdown("---")
-                        
-                        st.warning(f"⚠️ This will delete **{len(surgeries_in_slot)} surgery(ies)** and associated patient data")
-                        
-                        col1, col2 = st.columns([1, 3])
-                        with col1:
-                            if st.button("🗑️ Delete All", type="primary", key="delete_timeslot"):
-                                with st.spinner(f"Deleting schedules in timeslot..."):
-                                    success = onto_mgr.delete_schedule_by_timeslot(selected_timeslot)
-                                    if success:
-                                        st.success(f"✅ Successfully deleted all schedules in timeslot")
-                                        st.cache_resource.clear()
-                                        st.rerun()
-                                    else:
-                                        st.error("❌ Failed to delete schedules")
-                    else:
-                        st.info(f"No surgeries scheduled in this timeslot")
-            else:
-                st.info("No timeslots found in the system")
-        
-        elif delete_option == "Delete All Schedules":
-            st.subheader("⚠️ Delete ALL Schedules")
-            
-            st.error("🚨 **DANGER ZONE** 🚨")
-            st.warning("This will permanently delete ALL surgeries and patients from the system!")
-            
-            # Show current statistics
-            summary = onto_mgr.get_ontology_summary()
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Total Surgeries", summary['surgeries'])
-            with col2:
-                st.metric("Total Patients", summary['patients'])
-            
-            st.markdown("---")
-            
-            # Confirmation checkbox
-            confirm = st.checkbox("I understand this action cannot be undone")
-            
-            if confirm:
-                col1, col2 = st.columns([1, 3])
-                with col1:
-                    if st.button("🗑️ DELETE ALL", type="primary", key="delete_all"):
-                        with st.spinner("Deleting all schedules..."):
-                            success = onto_mgr.delete_all_schedules()
-                            if success:
-                                st.success("✅ Successfully deleted all schedules")
-                                st.cache_resource.clear()
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed to delete schedules")
-            else:
-                st.info("👆 Check the box above to enable deletion")
+        _tab_delete_schedule(onto_mgr, rag_retriever, response_cache)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,18 +1,43 @@
+import orjson
 import requests
-from typing import Optional, Dict
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Iterator, List, Callable
+
+# Character budget for retrieved context (max ~4000 chars to be safe inside num_ctx=4096)
+MAX_CONTEXT_CHARS = 4000
+TRUNCATION_MARKER = "\n\n[Context truncated due to length...]"
+
+def _truncate_context(context: str) -> str:
+    """Cap context at MAX_CONTEXT_CHARS characters"""
+    if len(context) > MAX_CONTEXT_CHARS:
+        return context[:MAX_CONTEXT_CHARS] + TRUNCATION_MARKER
+    return context
 
 class OllamaClient:
     """Client for interacting with local Ollama LLM server"""
     
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.1:8b"):
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.1:8b", keep_alive: str = "1h"):
         self.base_url = base_url
         self.model = model
+        self.keep_alive = keep_alive  # How long Ollama keeps the model loaded after a request
+        self._prefix_cache: Dict[str, str] = {}
+        
+        # One pooled session so chat turns reuse the same TCP connection; a couple of
+        # quick retries cover Ollama briefly refusing connections while it loads a model
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                              max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive", "Content-Type": "application/json"})
         self._test_connection()
     
     def _test_connection(self):
         """Test if Ollama server is running"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             response.raise_for_status()
             print(f"✅ Connected to Ollama server")
             
@@ -25,34 +50,71 @@ class OllamaClient:
             print(f"❌ Cannot connect to Ollama: {e}")
             print("Make sure Ollama is running: ollama serve")
     
-    def generate(self, prompt: str, context: str = "", system_prompt: str = "") -> str:
-        """Generate response from Ollama"""
-        # Truncate context if too long (max ~4000 chars to be safe)
-        max_context_length = 4000
-        if len(context) > max_context_length:
-            context = context[:max_context_length] + "\n\n[Context truncated due to length...]"
+    def list_models(self) -> List[str]:
+        """Names of the models pulled into the Ollama server (empty if unreachable)"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+            response.raise_for_status()
+            return [m['name'] for m in orjson.loads(response.content).get('models', [])]
+        except Exception as e:
+            print(f"⚠️ Could not list Ollama models: {e}")
+            return []
+    
+    def warmup(self, background: bool = False):
+        """Load the current model into Ollama memory so the first real query skips the cold start"""
+        if background:
+            threading.Thread(target=self.warmup, daemon=True).start()
+            return
+        
+        try:
+            # An empty prompt makes Ollama load the model without generating anything
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                data=orjson.dumps({"model": self.model, "prompt": "", "stream": False,
+                                   "keep_alive": self.keep_alive}),
+                timeout=120
+            )
+            response.raise_for_status()
+            print(f"✅ Model '{self.model}' loaded")
+        except Exception as e:
+            print(f"⚠️ Could not warm up model '{self.model}': {e}")
+    
+    def _build_payload(self, prompt: str, context: str, system_prompt: str, stream: bool) -> Dict:
+        """Build the /api/generate request body shared by generate and stream_generate"""
+        # Truncate context if too long
+        context = _truncate_context(context)
         
-        full_prompt = f"{system_prompt}\n\nContext:\n{context}\n\nUser Query: {prompt}\n\nResponse:"
+        # The static system part is built once and reused verbatim, so every turn starts with
+        # the same bytes and Ollama can reuse its KV cache for that prefix
+        prefix = self._prefix_cache.get(system_prompt)
+        if prefix is None:
+            prefix = self._prefix_cache[system_prompt] = f"{system_prompt}\n\nContext:\n"
+        full_prompt = "".join((prefix, context, "\n\nUser Query: ", prompt, "\n\nResponse:"))
         
-        url = f"{self.base_url}/api/generate"
-        payload = {
+        return {
             "model": self.model,
             "prompt": full_prompt,
-            "stream": False,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
             "options": {
                 "num_ctx": 4096,  # Context window size
                 "temperature": 0.7
             }
         }
+    
+    def generate(self, prompt: str, context: str = "", system_prompt: str = "") -> str:
+        """Generate response from Ollama"""
+        url = f"{self.base_url}/api/generate"
+        payload = self._build_payload(prompt, context, system_prompt, stream=False)
         
         try:
-            response = requests.post(url, json=payload, timeout=120)
+            response = self.session.post(url, data=orjson.dumps(payload), timeout=120)
             response.raise_for_status()
-            return response.json().get('response', 'No response generated')
+            return orjson.loads(response.content).get('response', 'No response generated')
         except requests.exceptions.HTTPError as e:
             # Try to get detailed error from response
             try:
-                error_detail = response.json().get('error', str(e))
+                error_detail = orjson.loads(response.content).get('error', str(e))
             except:
                 error_detail = str(e)
             print(f"❌ Ollama HTTP Error: {error_detail}")
@@ -63,29 +125,116 @@ class OllamaClient:
             print(f"❌ Unexpected error: {e}")
             return f"⚠️ Error generating response: {e}"
     
-    def stream_generate(self, prompt: str, context: str = "", system_prompt: str = ""):
-        """Generate streaming response from Ollama"""
-        full_prompt = f"{system_prompt}\n\nContext:\n{context}\n\nUser Query: {prompt}\n\nResponse:"
-        
+    def stream_generate(self, prompt: str, context: str = "", system_prompt: str = "",
+                        status: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Generate streaming response from Ollama, yielding tokens as they arrive.
+        If the request fails, the error text is yielded and status['error'] is set.
+        """
         url = f"{self.base_url}/api/generate"
-        payload = {
+        payload = self._build_payload(prompt, context, system_prompt, stream=True)
+        return self._stream_tokens(url, payload, lambda data: data.get('response'), status)
+    
+    def build_chat_messages(self, prompt: str, context: str = "", system_prompt: str = "",
+                            history: List[Dict] = None) -> List[Dict]:
+        """
+        Role-separated messages for /api/chat. Stable content (system prompt, earlier turns)
+        comes first so Ollama can reuse its KV cache; the per-turn context goes in the last message.
+        """
+        messages = [{"role": "system", "content": system_prompt}]
+        for message in history or []:
+            messages.append({"role": message['role'], "content": message['content']})
+        
+        context = _truncate_context(context)
+        messages.append({"role": "user", "content": f"Context:\n{context}\n\nUser Query: {prompt}"})
+        return messages
+    
+    def _build_chat_payload(self, messages: List[Dict], stream: bool) -> Dict:
+        """Build the /api/chat request body"""
+        return {
             "model": self.model,
-            "prompt": full_prompt,
-            "stream": True
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "num_ctx": 4096,  # Context window size
+                "temperature": 0.7
+            }
         }
+    
+    def chat(self, messages: List[Dict]) -> str:
+        """Generate a chat response from Ollama"""
+        url = f"{self.base_url}/api/chat"
+        payload = self._build_chat_payload(messages, stream=False)
         
         try:
-            response = requests.post(url, json=payload, stream=True, timeout=120)
+            response = self.session.post(url, data=orjson.dumps(payload), timeout=120)
             response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    import json
-                    try:
-                        data = json.loads(line)
-                        if 'response' in data:
-                            yield data['response']
-                    except json.JSONDecodeError:
-                        continue
+            return orjson.loads(response.content).get('message', {}).get('content', 'No response generated')
+        except requests.exceptions.Timeout:
+            return "⚠️ Request timed out. The model might be too slow or overloaded. Try a smaller model."
+        except Exception as e:
+            print(f"❌ Unexpected error: {e}")
+            return f"⚠️ Error generating response: {e}"
+    
+    def stream_chat(self, messages: List[Dict], status: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream a chat response from Ollama, yielding tokens as they arrive.
+        If the request fails, the error text is yielded and status['error'] is set,
+        so callers can tell a failure apart from an answer (e.g. to skip caching it).
+        """
+        url = f"{self.base_url}/api/chat"
+        payload = self._build_chat_payload(messages, stream=True)
+        return self._stream_tokens(url, payload, lambda data: data.get('message', {}).get('content'), status)
+    
+    def _stream_tokens(self, url: str, payload: Dict, extract: Callable[[Dict], Optional[str]],
+                       status: Optional[Dict] = None) -> Iterator[str]:
+        """POST a streaming request and yield the text extracted from each NDJSON line"""
+        if status is None:
+            status = {}
+        try:
+            # Context manager returns the connection to the pool even if the consumer stops early
+            with self.session.post(url, data=orjson.dumps(payload), stream=True, timeout=120) as response:
+                if not response.ok:
+                    response.content  # read the error body before the connection is released
+                response.raise_for_status()
+                
+                # Split NDJSON ourselves on raw 8 KiB reads: no per-line decode, and
+                # several short token lines are handled per read
+                buffer = b""
+                for chunk in response.iter_content(chunk_size=8192):
+                    buffer += chunk
+                    start = 0
+                    while (newline := buffer.find(b"\n", start)) != -1:
+                        line = buffer[start:newline]
+                        start = newline + 1
+                        if not line:
+                            continue
+                        try:
+                            data = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            continue
+                        if 'error' in data:
+                            status['error'] = data['error']
+                            yield f"⚠️ Error generating response: {data['error']}"
+                            return
+                        token = extract(data)
+                        if token:
+                            yield token
+                    buffer = buffer[start:]
+        except requests.exceptions.HTTPError as e:
+            # Ollama puts the real reason (e.g. "model not found") in the JSON body
+            try:
+                error_detail = orjson.loads(e.response.content).get('error', str(e))
+            except Exception:
+                error_detail = str(e)
+            print(f"❌ Ollama HTTP Error: {error_detail}")
+            status['error'] = error_detail
+            yield f"⚠️ Error generating response: {error_detail}\n\nTry using a smaller model like 'qwen:1.8b' or restart Ollama."
+        except requests.exceptions.Timeout:
+            status['error'] = "timeout"
+            yield "⚠️ Request timed out. The model might be too slow or overloaded. Try a smaller model."
         except Exception as e:
-            yield f"⚠️ Error: {e}"
\ No newline at end of file
+            print(f"❌ Unexpected error: {e}")
+            status['error'] = str(e)
+            yield f"⚠️ Error: {e}"
@@ -0,0 +1,121 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from diskcache import Cache
+
+class ResponseCache:
+    """
+    Two-tier LRU cache for chat responses, per model.
+    Exact hits are keyed on the model and the normalized query text; near-duplicate
+    questions are matched by cosine similarity of their query embeddings among
+    the answers of the same model.
+    """
+
+    def __init__(self, max_size: int = 512, similarity_threshold: float = 0.95):
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+        # Stacked unit-norm embeddings, rebuilt lazily after inserts/evictions
+        self._matrix = None
+        self._matrix_keys: List[str] = []
+        self._matrix_models = None
+
+    @staticmethod
+    def make_key(query: str, model: str) -> str:
+        """Hash of the model and the normalized query text"""
+        return hashlib.sha1(f"{model}\0{query.strip().lower()}".encode()).hexdigest()
+
+    def get(self, query: str, model: str) -> Optional[Dict]:
+        """Exact-match lookup on the normalized query for this model"""
+        key = self.make_key(query, model)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get_similar(self, embedding, model: str) -> Optional[Dict]:
+        """Return this model's cached entry whose query embedding is most similar, if above threshold"""
+        if not self._entries:
+            return None
+
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[k]['embedding'] for k in self._matrix_keys])
+            self._matrix_models = np.array([self._entries[k]['model'] for k in self._matrix_keys])
+
+        sims = np.where(self._matrix_models == model, self._matrix @ self._normalize(embedding), -np.inf)
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity_threshold:
+            return None
+
+        key = self._matrix_keys[best]
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, query: str, model: str, embedding, response: str, sources: List[str]):
+        """Insert a model's response, evicting the least recently used entry on overflow"""
+        key = self.make_key(query, model)
+        self._entries[key] = {
+            'query': query,
+            'model': model,
+            'embedding': self._normalize(embedding),
+            'response': response,
+            'sources': sources
+        }
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        self._matrix = None
+
+    def clear(self):
+        """Drop all cached responses"""
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+        self._matrix_models = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class DiskResponseCache:
+    """
+    Persistent (SQLite-backed) answer cache that survives app restarts.
+    Keyed on the normalized query, the ontology version and the model, so an
+    edited schedule or a different model never serves an old answer.
+    """
+
+    def __init__(self, directory: str = ".cache/qa", expire: int = 3600):
+        self.expire = expire
+        self._cache = Cache(directory)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return re.sub(r"\s+", " ", query.strip().lower())
+
+    def get(self, query: str, version: int, model: str) -> Optional[Tuple[str, List[str]]]:
+        """Return (response, sources) for this query, or None"""
+        return self._cache.get((self.normalize(query), version, model))
+
+    def put(self, query: str, version: int, model: str, response: str, sources: List[str]):
+        """Store a response; entries expire after self.expire seconds"""
+        self._cache.set((self.normalize(query), version, model), (response, sources), expire=self.expire)
+
+    def clear(self):
+        """Drop all persisted responses"""
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
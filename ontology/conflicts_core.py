@@ -0,0 +1,44 @@
+import numpy as np
+from typing import Tuple
+
+def find_overlaps(starts, ends, group_ids=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (i, j), i < j, of intervals in the same group that overlap
+    (starts[i] < ends[j] and starts[j] < ends[i]).
+
+    Vectorized sort-and-sweep: intervals are sorted by (group, start), and for each
+    one a binary search finds the later-starting intervals that begin before it ends,
+    so the work is O(N log N + K) for K candidate pairs instead of comparing every pair.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    groups = np.zeros(len(starts), dtype=np.int64) if group_ids is None else np.asarray(group_ids, dtype=np.int64)
+
+    if len(starts) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # Fold the group into the sort key so a search never crosses into another group
+    low = min(starts.min(), ends.min())
+    span = max(starts.max(), ends.max()) - low + 1
+    keys = groups * span + (starts - low)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    # Sorted positions a+1 .. hi[a]-1 start at or after interval a and before it ends
+    limits = groups[order] * span + (np.maximum(ends[order], starts[order]) - low)
+    hi = np.searchsorted(sorted_keys, limits, side="left")
+    counts = np.maximum(hi - np.arange(len(order)) - 1, 0)
+
+    a = np.repeat(np.arange(len(order)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    b = a + 1 + offsets
+
+    i, j = order[a], order[b]
+    # Both directions of the overlap test (catches zero-length and reversed intervals)
+    keep = (starts[i] < ends[j]) & (starts[j] < ends[i])
+    i, j = i[keep], j[keep]
+
+    first, second = np.minimum(i, j), np.maximum(i, j)
+    pair_order = np.lexsort((second, first))
+    return first[pair_order], second[pair_order]
@@ -1,4 +1,5 @@
 from owlready2 import *
+from collections import defaultdict
 from typing import List, Dict, Optional, Any
 from datetime import time as Time
 import os
@@ -17,16 +18,33 @@ class OntologyManager:
     Handles all CRUD operations on the knowledge base
     """
     
-    def __init__(self, owl_file: str = "ontology/hospital.owl"):
-        """Initialize ontology manager"""
+    def __init__(self, owl_file: str = "ontology/hospital.owl", save_format: str = "ntriples"):
+        """Initialize ontology manager (save_format: "ntriples", or "rdfxml" for tools that need XML)"""
         self.owl_file = owl_file
+        self.save_format = save_format
         
-        # Load or create ontology
+        # Load or create ontology into a private in-memory World: reads never touch disk,
+        # and a reload (e.g. after a Streamlit cache clear) gets a fresh quadstore
+        # instead of the copy already sitting in default_world
         if os.path.exists(owl_file):
-            self.onto = get_ontology(owl_file).load()
+            self.world = World()
+            self.onto = self.world.get_ontology(owl_file).load()
             print(f"✅ Loaded existing ontology from {owl_file}")
         else:
             raise FileNotFoundError(f"Ontology file {owl_file} not found")
+        
+        # Version stamp for caches built on top of the ontology; changes on every save.
+        # Seeded from the file mtime so it stays unique across reloads and restarts.
+        self.version = os.stat(owl_file).st_mtime_ns
+        self._name_index = {}
+        self._name_index_version = None
+        self._schedule_index = {}
+        self._schedule_index_version = None
+        
+        # Fixed reference data resolved once: severity level label ("Severe", ...) -> Severity instance
+        self.severity_by_level = {
+            _get_value(s.severity_level): s for s in self.onto.Severity.instances() if s.severity_level
+        }
     
     
     # ========== QUERY METHODS ==========
@@ -35,9 +53,20 @@ class OntologyManager:
         """Return all surgeon instances"""
         return list(self.onto.Surgeon.instances())
     
+    def _ensure_name_index(self) -> Dict:
+        """Rebuild the name -> individual index if the ontology changed since it was built"""
+        if self._name_index_version != self.version:
+            self._name_index = {e.name: e for e in self.onto.individuals()}
+            self._name_index_version = self.version
+        return self._name_index
+    
+    def get_entity(self, name: str):
+        """Find any individual by exact name (index rebuilt when the ontology changes)"""
+        return self._ensure_name_index().get(name)
+    
     def get_surgeon_by_name(self, name: str):
         """Find surgeon by name"""
-        return self.onto.search_one(iri=f"*{name}")
+        return self.get_entity(name)
     
     def get_all_theatres(self) -> List:
         """Return all theatre instances"""
@@ -54,13 +83,69 @@ class OntologyManager:
     def get_all_timeslots(self) -> List:
         """Return all timeslot instances"""
         return list(self.onto.TimeSlot.instances())
+    
+    def get_all_entities_bulk(self, class_names: List[str] = None) -> Dict[str, List[str]]:
+        """Names of all instances of several classes (subclasses included) in one SPARQL query"""
+        class_names = class_names or ["Surgeon", "Theatre", "Surgery", "Patient", "TimeSlot", "Ward", "RecoveryRoom"]
+        classes = [getattr(self.onto, name) for name in class_names]
+        
+        # Dicts keep first-seen order and drop duplicates from multiple subclass paths
+        result = {name: {} for name in class_names}
+        try:
+            placeholders = ", ".join("??" for _ in classes)
+            rows = self.onto.world.sparql(f"""
+                SELECT ?s ?cls WHERE {{
+                    ?s rdf:type/rdfs:subClassOf* ?cls .
+                    FILTER(?cls IN ({placeholders}))
+                }}
+            """, classes)
+            for individual, cls in rows:
+                result[cls.name][individual.name] = None
+        except Exception as e:
+            print(f"⚠️ Bulk SPARQL lookup failed, falling back to per-class scans: {e}")
+            result = {name: {i.name: None for i in cls.instances()} for name, cls in zip(class_names, classes)}
+        
+        return {name: list(names) for name, names in result.items()}
 
+    def _ensure_schedule_index(self) -> Dict:
+        """Rebuild surgery lookups (by timeslot, by theatre, patient per surgery) once per ontology version"""
+        if self._schedule_index_version != self.version:
+            by_timeslot = defaultdict(list)
+            by_theatre = defaultdict(list)
+            for surgery in self.onto.Surgery.instances():
+                if surgery.has_timeslot:
+                    by_timeslot[surgery.has_timeslot[0]].append(surgery)
+                if surgery.requires_theatre_type:
+                    by_theatre[surgery.requires_theatre_type[0]].append(surgery)
+            
+            # First patient found wins, matching the old linear scan
+            patient_of = {}
+            for p in self.onto.Patient.instances():
+                for surgery in p.undergoes_surgery:
+                    patient_of.setdefault(surgery, p.name)
+            
+            self._schedule_index = {'by_timeslot': by_timeslot, 'by_theatre': by_theatre, 'patient_of': patient_of}
+            self._schedule_index_version = self.version
+        return self._schedule_index
+    
+    def get_surgeries_in_timeslot(self, timeslot) -> List:
+        """Return surgeries booked in a timeslot (served from the schedule index)"""
+        return list(self._ensure_schedule_index()['by_timeslot'].get(timeslot, []))
+    
+    def get_surgeries_in_theatre(self, theatre) -> List:
+        """Return surgeries booked in a theatre (served from the schedule index)"""
+        return list(self._ensure_schedule_index()['by_theatre'].get(theatre, []))
+    
+    def _patients_of(self, surgery) -> List:
+        """
+        Patients undergoing a surgery, read through the inverse property: the quadstore
+        looks them up by object instead of every patient being scanned
+        """
+        return list(surgery.performed_on)
+    
     def _get_patient_for_surgery(self, surgery) -> str:
         """Helper to find the patient undergoing a specific surgery"""
-        for p in self.onto.Patient.instances():
-            if surgery in p.undergoes_surgery:
-                return p.name
-        return 'N/A'
+        return self._ensure_schedule_index()['patient_of'].get(surgery, 'N/A')
     
     def get_surgeon_schedule(self, surgeon_name: str) -> List[Dict]:
         """Get all surgeries for a specific surgeon"""
@@ -83,35 +168,35 @@ class OntologyManager:
     
     def get_theatre_schedule(self, theatre_name: str) -> List[Dict]:
         """Get all surgeries scheduled in a specific theatre"""
-        theatre = self.onto.search_one(iri=f"*{theatre_name}")
+        theatre = self.get_entity(theatre_name)
         if not theatre:
             return []
         
         schedule = []
-        for surgery in self.onto.Surgery.instances():
-            if surgery.requires_theatre_type and surgery.requires_theatre_type[0] == theatre:
-                if surgery.has_timeslot:
-                    timeslot = surgery.has_timeslot[0]
-                    schedule.append({
-                        'surgery': surgery.name,
-                        'patient': self._get_patient_for_surgery(surgery),
-                        'surgeon': _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A',
-                        'start_time': _get_value(timeslot.start_time, 'N/A'),
-                        'end_time': _get_value(timeslot.end_time, 'N/A')
-                    })
+        for surgery in self._ensure_schedule_index()['by_theatre'].get(theatre, []):
+            if surgery.has_timeslot:
+                timeslot = surgery.has_timeslot[0]
+                schedule.append({
+                    'surgery': surgery.name,
+                    'patient': self._get_patient_for_surgery(surgery),
+                    'surgeon': _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A',
+                    'start_time': _get_value(timeslot.start_time, 'N/A'),
+                    'end_time': _get_value(timeslot.end_time, 'N/A')
+                })
         return schedule
     
     # ========== CREATE METHODS ==========
     
-    def add_surgeon(self, name: str, license_number: str, theatre_name: str) -> bool:
+    def add_surgeon(self, name: str, license_number: int, theatre_name: str) -> bool:
         """Add a new surgeon to the ontology"""
         try:
             with self.onto:
                 surgeon = self.onto.Surgeon(name)
-                surgeon.has_license_number = [license_number]
+                # Functional xsd:integer property, matching the builder
+                surgeon.has_license_number = int(license_number)
                 
                 # Find or create theatre
-                theatre = self.onto.search_one(iri=f"*{theatre_name}")
+                theatre = self.get_entity(theatre_name)
                 if theatre:
                     surgeon.works_in_theatre = [theatre]
                 
@@ -136,12 +221,12 @@ class OntologyManager:
                     surgery.performs_operation = [surgeon]
                 
                 # Link theatre
-                theatre = self.onto.search_one(iri=f"*{theatre_name}")
+                theatre = self.get_entity(theatre_name)
                 if theatre:
                     surgery.requires_theatre_type = [theatre]
                 
                 # Link timeslot
-                timeslot = self.onto.search_one(iri=f"*{timeslot_name}")
+                timeslot = self.get_entity(timeslot_name)
                 if timeslot:
                     surgery.has_timeslot = [timeslot]
             
@@ -181,22 +266,22 @@ class OntologyManager:
         """Get all surgeries scheduled for a specific date"""
         try:
             timeslots = self.get_timeslots_by_date(date)
+            by_timeslot = self._ensure_schedule_index()['by_timeslot']
             surgeries = []
             
             for ts in timeslots:
                 # Find surgeries in this timeslot
-                for surgery in self.onto.Surgery.instances():
-                    if surgery.has_timeslot and surgery.has_timeslot[0] == ts:
-                        surgeries.append({
-                            'surgery': surgery.name,
-                            'patient': self._get_patient_for_surgery(surgery),
-                            'surgeon': _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A',
-                            'theatre': _get_value(surgery.requires_theatre_type).name if surgery.requires_theatre_type else 'N/A',
-                            'start_time': _get_value(ts.start_time, 'N/A'),
-                            'end_time': _get_value(ts.end_time, 'N/A'),
-                            'date': date,
-                            'is_emergency': _get_value(surgery.is_emergency, False)
-                        })
+                for surgery in by_timeslot.get(ts, []):
+                    surgeries.append({
+                        'surgery': surgery.name,
+                        'patient': self._get_patient_for_surgery(surgery),
+                        'surgeon': _get_value(surgery.performs_operation).name if surgery.performs_operation else 'N/A',
+                        'theatre': _get_value(surgery.requires_theatre_type).name if surgery.requires_theatre_type else 'N/A',
+                        'start_time': _get_value(ts.start_time, 'N/A'),
+                        'end_time': _get_value(ts.end_time, 'N/A'),
+                        'date': date,
+                        'is_emergency': _get_value(surgery.is_emergency, False)
+                    })
             
             return surgeries
         except Exception as e:
@@ -218,14 +303,13 @@ class OntologyManager:
         """Delete a surgery and its associated patient from the ontology"""
         try:
             # Find the surgery
-            surgery = self.onto.search_one(iri=f"*{surgery_name}")
+            surgery = self.get_entity(surgery_name)
             if not surgery:
                 print(f"❌ Surgery '{surgery_name}' not found")
                 return False
             
             # Find and delete associated patient
-            patients = [p for p in self.onto.Patient.instances() 
-                       if surgery in p.undergoes_surgery]
+            patients = self._patients_of(surgery)
             
             for patient in patients:
                 print(f"🗑️ Deleting associated patient: {patient.name}")
@@ -246,7 +330,7 @@ class OntologyManager:
     def delete_patient(self, patient_name: str) -> bool:
         """Delete a patient from the ontology"""
         try:
-            patient = self.onto.search_one(iri=f"*{patient_name}")
+            patient = self.get_entity(patient_name)
             if not patient:
                 print(f"❌ Patient '{patient_name}' not found")
                 return False
@@ -278,8 +362,7 @@ class OntologyManager:
             deleted_count = 0
             for surgery in surgeries:
                 # Find and delete associated patients
-                patients = [p for p in self.onto.Patient.instances() 
-                           if surgery in p.undergoes_surgery]
+                patients = self._patients_of(surgery)
                 
                 for patient in patients:
                     print(f"🗑️ Deleting patient: {patient.name}")
@@ -300,14 +383,13 @@ class OntologyManager:
     def delete_schedule_by_timeslot(self, timeslot_name: str) -> bool:
         """Delete all surgeries in a specific timeslot"""
         try:
-            timeslot = self.onto.search_one(iri=f"*{timeslot_name}")
+            timeslot = self.get_entity(timeslot_name)
             if not timeslot:
                 print(f"❌ Timeslot '{timeslot_name}' not found")
                 return False
             
             # Find surgeries in this timeslot
-            surgeries = [s for s in self.onto.Surgery.instances() 
-                        if s.has_timeslot and s.has_timeslot[0] == timeslot]
+            surgeries = self.get_surgeries_in_timeslot(timeslot)
             
             if not surgeries:
                 print(f"ℹ️ No surgeries found in timeslot '{timeslot_name}'")
@@ -316,8 +398,7 @@ class OntologyManager:
             deleted_count = 0
             for surgery in surgeries:
                 # Find and delete associated patients
-                patients = [p for p in self.onto.Patient.instances() 
-                           if surgery in p.undergoes_surgery]
+                patients = self._patients_of(surgery)
                 
                 for patient in patients:
                     print(f"🗑️ Deleting patient: {patient.name}")
@@ -367,16 +448,12 @@ class OntologyManager:
     def get_schedule_info(self, surgery_name: str) -> Optional[Dict]:
         """Get detailed information about a specific surgery schedule"""
         try:
-            surgery = self.onto.search_one(iri=f"*{surgery_name}")
+            surgery = self.get_entity(surgery_name)
             if not surgery:
                 return None
             
             # Get associated patient
-            patient = None
-            for p in self.onto.Patient.instances():
-                if surgery in p.undergoes_surgery:
-                    patient = p
-                    break
+            patient = _get_value(self._patients_of(surgery))
             
             timeslot = _get_value(surgery.has_timeslot)
             info = {
@@ -402,7 +479,7 @@ class OntologyManager:
     def get_patient_info(self, patient_name: str) -> Optional[Dict]:
         """Get detailed information about a specific patient"""
         try:
-            patient = self.onto.search_one(iri=f"*{patient_name}")
+            patient = self.get_entity(patient_name)
             if not patient:
                 return None
             
@@ -451,20 +528,23 @@ class OntologyManager:
     
     def count_entities(self) -> int:
         """Count total entities in ontology"""
-        return len(list(self.onto.individuals()))
+        return len(self._ensure_name_index())
     
     def save(self):
         """Save ontology changes"""
-        self.onto.save(file=self.owl_file, format="rdfxml")
+        # N-Triples is a linear write (no subject nesting), and load() detects the format itself
+        self.onto.save(file=self.owl_file, format=self.save_format)
+        self.version = max(self.version + 1, os.stat(self.owl_file).st_mtime_ns)
         print("💾 Ontology saved")
     
     def get_ontology_summary(self) -> Dict:
         """Get summary statistics"""
+        names = self.get_all_entities_bulk(["Surgeon", "Theatre", "Surgery", "Patient", "TimeSlot"])
         return {
             'total_entities': self.count_entities(),
-            'surgeons': len(list(self.onto.Surgeon.instances())),
-            'theatres': len(list(self.onto.Theatre.instances())),
-            'surgeries': len(list(self.onto.Surgery.instances())),
-            'patients': len(list(self.onto.Patient.instances())),
-            'timeslots': len(list(self.onto.TimeSlot.instances()))
+            'surgeons': len(names['Surgeon']),
+            'theatres': len(names['Theatre']),
+            'surgeries': len(names['Surgery']),
+            'patients': len(names['Patient']),
+            'timeslots': len(names['TimeSlot'])
         }
\ No newline at end of file
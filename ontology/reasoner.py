@@ -1,6 +1,8 @@
 from owlready2 import sync_reasoner_pellet, Imp
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 from datetime import datetime
+from functools import lru_cache
+from ontology.conflicts_core import find_overlaps
 
 def _get_value(prop, default=None) -> Any:
     """Safely get a property value, handling both list and scalar values."""
@@ -10,6 +12,26 @@ def _get_value(prop, default=None) -> Any:
         return prop[0] if prop else default
     return prop
 
+@lru_cache(maxsize=None)
+def _parse_seconds(t_str: str) -> Optional[int]:
+    """Seconds since midnight for a time string in any of the formats used by the ontology (memoized)"""
+    t_str = t_str.strip()
+    # Fast path for the plain "HH:MM" the ontology stores
+    h, sep, m = t_str.partition(":")
+    if sep and h.isdigit() and m.isdigit() and len(m) == 2 and int(h) < 24 and int(m) < 60:
+        return int(h) * 3600 + int(m) * 60
+    for fmt in ["%H:%M", "%H:%M:%S", "%I:%M %p"]:
+        try:
+            t = datetime.strptime(t_str, fmt)
+            return t.hour * 3600 + t.minute * 60 + t.second
+        except ValueError:
+            continue
+    return None
+
+def _time_seconds(t_str) -> Optional[int]:
+    """_parse_seconds for strings, None for anything else"""
+    return _parse_seconds(t_str) if isinstance(t_str, str) else None
+
 class ConflictDetector:
     """
     Detects scheduling conflicts using ontology reasoning
@@ -19,12 +41,23 @@ class ConflictDetector:
     def __init__(self, ontology_manager):
         self.onto_mgr = ontology_manager
         self.onto = ontology_manager.onto
+        
+        # Parsed (start, end) per timeslot, reset whenever the ontology version changes
+        self._intervals = {}
+        self._intervals_version = None
+        self._reasoned_version = None
     
     def run_pellet_reasoner(self):
-        """Execute Pellet reasoner to infer conflicts"""
+        """Execute Pellet reasoner to infer conflicts (skipped if the ontology is unchanged since the last run)"""
+        if self._reasoned_version == self.onto_mgr.version:
+            print("✅ Reasoner results are up to date")
+            return True
+        
         try:
             print("🔄 Running Pellet reasoner...")
-            sync_reasoner_pellet(infer_property_values=True, infer_data_property_values=True)
+            # Conflicts are class memberships; property values are all asserted already
+            sync_reasoner_pellet(self.onto_mgr.world, infer_property_values=False, infer_data_property_values=False)
+            self._reasoned_version = self.onto_mgr.version
             print("✅ Reasoner completed")
             return True
         except Exception as e:
@@ -69,8 +102,10 @@ class ConflictDetector:
     
     def check_surgeon_conflicts(self, surgeon_name: str = None) -> List[Dict]:
         """Check if surgeon has overlapping surgeries"""
-        conflicts = []
-        
+        return list(self._iter_surgeon_conflicts(surgeon_name))
+    
+    def _iter_surgeon_conflicts(self, surgeon_name: str = None) -> Iterator[Dict]:
+        """Yield surgeon double-bookings one at a time"""
         surgeons = [self.onto_mgr.get_surgeon_by_name(surgeon_name)] if surgeon_name else self.onto_mgr.get_all_surgeons()
         
         for surgeon in surgeons:
@@ -79,59 +114,49 @@ class ConflictDetector:
             
             surgeries = list(surgeon.performs_operation)
             
-            # Compare all pairs of surgeries
-            for i in range(len(surgeries)):
-                for j in range(i + 1, len(surgeries)):
-                    surgery1 = surgeries[i]
-                    surgery2 = surgeries[j]
-                    
-                    if self._surgeries_overlap(surgery1, surgery2):
-                        conflicts.append({
-                            'type': 'Surgeon Double-Booking',
-                            'surgeon': surgeon.name,
-                            'surgery1': surgery1.name,
-                            'surgery2': surgery2.name,
-                            'severity': 'HIGH',
-                            'description': f"{surgeon.name} is scheduled for two surgeries at overlapping times"
-                        })
-        
-        return conflicts
+            for i, j in self._overlapping_pairs(surgeries):
+                yield {
+                    'type': 'Surgeon Double-Booking',
+                    'surgeon': surgeon.name,
+                    'surgery1': surgeries[i].name,
+                    'surgery2': surgeries[j].name,
+                    'severity': 'HIGH',
+                    'description': f"{surgeon.name} is scheduled for two surgeries at overlapping times"
+                }
     
     def check_theatre_conflicts(self, theatre_name: str = None) -> List[Dict]:
         """Check if theatre has overlapping bookings"""
-        conflicts = []
-        
-        theatres = [self.onto.search_one(iri=f"*{theatre_name}")] if theatre_name else self.onto_mgr.get_all_theatres()
+        return list(self._iter_theatre_conflicts(theatre_name))
+    
+    def _iter_theatre_conflicts(self, theatre_name: str = None) -> Iterator[Dict]:
+        """Yield theatre double-bookings one at a time"""
+        theatres = [self.onto_mgr.get_entity(theatre_name)] if theatre_name else self.onto_mgr.get_all_theatres()
         
         for theatre in theatres:
             if not theatre:
                 continue
             
             # Get all surgeries in this theatre
-            surgeries = [s for s in self.onto.Surgery.instances() 
-                        if s.requires_theatre_type and _get_value(s.requires_theatre_type) == theatre]
+            surgeries = self.onto_mgr.get_surgeries_in_theatre(theatre)
             
-            # Compare all pairs
-            for i in range(len(surgeries)):
-                for j in range(i + 1, len(surgeries)):
-                    if self._surgeries_overlap(surgeries[i], surgeries[j]):
-                        conflicts.append({
-                            'type': 'Theatre Double-Booking',
-                            'theatre': theatre.name,
-                            'surgery1': surgeries[i].name,
-                            'surgery2': surgeries[j].name,
-                            'severity': 'HIGH',
-                            'description': f"{theatre.name} is double-booked"
-                        })
-        
-        return conflicts
+            for i, j in self._overlapping_pairs(surgeries):
+                yield {
+                    'type': 'Theatre Double-Booking',
+                    'theatre': theatre.name,
+                    'surgery1': surgeries[i].name,
+                    'surgery2': surgeries[j].name,
+                    'severity': 'HIGH',
+                    'description': f"{theatre.name} is double-booked"
+                }
     
 
     
     def check_specialization_mismatches(self) -> List[Dict]:
         """Check if surgeons are working in wrong theatre types"""
-        mismatches = []
-        
+        return list(self._iter_specialization_mismatches())
+    
+    def _iter_specialization_mismatches(self) -> Iterator[Dict]:
+        """Yield specialization mismatches one at a time"""
         for surgery in self.onto.Surgery.instances():
             if not surgery.performs_operation or not surgery.requires_theatre_type:
                 continue
@@ -145,7 +170,7 @@ class ConflictDetector:
                 if required_theatre not in surgeon_theatres:
                     # Create readable list of allowed theatres
                     allowed_names = ", ".join([t.name for t in surgeon_theatres])
-                    mismatches.append({
+                    yield {
                         'type': 'Specialization Mismatch',
                         'surgeon': surgeon.name,
                         'surgery': surgery.name,
@@ -153,39 +178,77 @@ class ConflictDetector:
                         'required_theatre': required_theatre.name,
                         'severity': 'MEDIUM',
                         'description': f"{surgeon.name} is authorized for [{allowed_names}] but surgery requires {required_theatre.name}"
-                    })
-        
-        return mismatches
+                    }
     
     def check_patient_conflicts(self, patient_name: str = None) -> List[Dict]:
         """Check if patient has overlapping surgeries"""
-        conflicts = []
-        
-        patients = [self.onto.search_one(iri=f"*{patient_name}")] if patient_name else self.onto_mgr.get_all_patients()
+        return list(self._iter_patient_conflicts(patient_name))
+    
+    def _iter_patient_conflicts(self, patient_name: str = None) -> Iterator[Dict]:
+        """Yield patient double-bookings one at a time"""
+        patients = [self.onto_mgr.get_entity(patient_name)] if patient_name else self.onto_mgr.get_all_patients()
         
         for patient in patients:
             if not patient:
                 continue
             
             # Get all surgeries for this patient
-            surgeries = patient.undergoes_surgery
+            surgeries = list(patient.undergoes_surgery)
             
-            # Compare all pairs
-            for i in range(len(surgeries)):
-                for j in range(i + 1, len(surgeries)):
-                    if self._surgeries_overlap(surgeries[i], surgeries[j]):
-                        conflicts.append({
-                            'type': 'Patient Double-Booking',
-                            'patient': patient.name,
-                            'surgery1': surgeries[i].name,
-                            'surgery2': surgeries[j].name,
-                            'severity': 'CRITICAL',
-                            'description': f"Patient {patient.name} is scheduled for two surgeries at overlapping times"
-                        })
-        return conflicts
+            for i, j in self._overlapping_pairs(surgeries):
+                yield {
+                    'type': 'Patient Double-Booking',
+                    'patient': patient.name,
+                    'surgery1': surgeries[i].name,
+                    'surgery2': surgeries[j].name,
+                    'severity': 'CRITICAL',
+                    'description': f"Patient {patient.name} is scheduled for two surgeries at overlapping times"
+                }
 
+    def check_new_surgery(self, surgeon_name: str, theatre_name: str, timeslot_name: str,
+                          exclude_surgery: str = None) -> List[Dict]:
+        """Check a proposed booking against only the surgeries in overlapping timeslots"""
+        conflicts = []
+        
+        timeslot = self.onto_mgr.get_entity(timeslot_name)
+        if not timeslot:
+            return conflicts
+        
+        for ts in self.onto_mgr.get_all_timeslots():
+            if not self._timeslots_overlap(timeslot, ts):
+                continue
+            
+            for surgery in self.onto_mgr.get_surgeries_in_timeslot(ts):
+                # Re-booking an existing surgery shouldn't clash with its own current slot
+                if surgery.name == exclude_surgery:
+                    continue
+                
+                surgeon = _get_value(surgery.performs_operation)
+                theatre = _get_value(surgery.requires_theatre_type)
+                
+                if surgeon and surgeon.name == surgeon_name:
+                    conflicts.append({
+                        'type': 'Surgeon Double-Booking',
+                        'surgeon': surgeon_name,
+                        'surgery': surgery.name,
+                        'severity': 'HIGH',
+                        'description': f"{surgeon_name} is already performing {surgery.name} in {ts.name}"
+                    })
+                if theatre and theatre.name == theatre_name:
+                    conflicts.append({
+                        'type': 'Theatre Double-Booking',
+                        'theatre': theatre_name,
+                        'surgery': surgery.name,
+                        'severity': 'HIGH',
+                        'description': f"{theatre_name} is already booked for {surgery.name} in {ts.name}"
+                    })
+        
+        return conflicts
+    
     def detect_all_conflicts(self) -> Dict[str, List[Dict]]:
         """Run all conflict detection checks"""
+        # Serial on purpose: the checks are owlready2 attribute reads that hold the GIL,
+        # so threads gave no speedup and raced on the shared interval cache
         return {
             'surgeon_conflicts': self.check_surgeon_conflicts(),
             'theatre_conflicts': self.check_theatre_conflicts(),
@@ -193,19 +256,67 @@ class ConflictDetector:
             'specialization_mismatches': self.check_specialization_mismatches()
         }
     
+    def detect_any_conflict(self) -> Iterator[Dict]:
+        """Yield conflicts lazily so callers can stop at the first one found"""
+        yield from self._iter_surgeon_conflicts()
+        yield from self._iter_theatre_conflicts()
+        yield from self._iter_patient_conflicts()
+        yield from self._iter_specialization_mismatches()
+    
     # ========== HELPER METHODS ==========
     
-    def _surgeries_overlap(self, surgery1, surgery2) -> bool:
-        """Check if two surgeries have overlapping timeslots"""
-        if not surgery1.has_timeslot or not surgery2.has_timeslot:
-            return False
+    def _timeslot_interval(self, ts) -> Optional[Tuple[int, int]]:
+        """(start, end) of a timeslot in seconds since midnight, or None if either time is missing/unparseable"""
+        # Work on a local reference: a reset swaps in a new dict rather than clearing the
+        # one another caller may still be reading
+        intervals = self._intervals
+        if self._intervals_version != self.onto_mgr.version:
+            intervals = {}
+            self._intervals = intervals
+            self._intervals_version = self.onto_mgr.version
         
-        ts1 = _get_value(surgery1.has_timeslot)
-        ts2 = _get_value(surgery2.has_timeslot)
+        interval = intervals.get(ts, False)
+        if interval is False:
+            start = _time_seconds(_get_value(ts.start_time)) if ts.start_time else None
+            end = _time_seconds(_get_value(ts.end_time)) if ts.end_time else None
+            interval = intervals[ts] = (start, end) if start is not None and end is not None else None
+        return interval
+    
+    def _overlapping_pairs(self, surgeries: List) -> List[Tuple[int, int]]:
+        """
+        Index pairs (i < j) of surgeries whose timeslots overlap, in the same order
+        as comparing every pair. Time overlaps come from the vectorized sort-and-sweep in
+        find_overlaps (O(N log N + overlaps)); asserted has_temporal_overlap links are looked up directly.
+        """
+        timeslots = [_get_value(s.has_timeslot) if s.has_timeslot else None for s in surgeries]
+        pairs = set()
         
-        if not ts1 or not ts2:
-            return False
+        # Time overlaps on integer seconds; positions are increasing, so i < j maps to k_i < k_j
+        timed = [(k, interval) for k, interval in
+                 ((k, self._timeslot_interval(ts)) for k, ts in enumerate(timeslots) if ts) if interval]
+        if timed:
+            positions_timed = [k for k, _ in timed]
+            first, second = find_overlaps([interval[0] for _, interval in timed],
+                                          [interval[1] for _, interval in timed])
+            pairs.update((positions_timed[i], positions_timed[j]) for i, j in zip(first.tolist(), second.tolist()))
+        
+        # Asserted overlaps count one way: the earlier surgery's slot lists the later one's
+        positions = {}
+        for k, ts in enumerate(timeslots):
+            if ts:
+                positions.setdefault(ts, []).append(k)
+        for i, ts in enumerate(timeslots):
+            if not ts or not getattr(ts, 'has_temporal_overlap', None):
+                continue
+            for other in ts.has_temporal_overlap:
+                for j in positions.get(other, []):
+                    if j > i:
+                        pairs.add((i, j))
         
+        return sorted(pairs)
+    
+    def _timeslots_overlap(self, ts1, ts2) -> bool:
+        """Check if two timeslots overlap (asserted overlap or by start/end times)"""
         # Check if timeslots have temporal overlap property
         if hasattr(ts1, 'has_temporal_overlap') and ts2 in ts1.has_temporal_overlap:
             return True
@@ -222,24 +333,14 @@ class ConflictDetector:
         return False
     
     def _times_overlap(self, start1: str, end1: str, start2: str, end2: str) -> bool:
-        """Check if two time ranges overlap using datetime objects"""
+        """Check if two time ranges overlap, comparing memoized seconds since midnight"""
         try:
-            # Helper to parse time string
-            def parse_time(t_str):
-                # Try multiple formats
-                for fmt in ["%H:%M", "%H:%M:%S", "%I:%M %p"]:
-                    try:
-                        return datetime.strptime(t_str.strip(), fmt).time()
-                    except ValueError:
-                        continue
-                return None
-
-            s1 = parse_time(start1)
-            e1 = parse_time(end1)
-            s2 = parse_time(start2)
-            e2 = parse_time(end2)
+            s1 = _time_seconds(start1)
+            e1 = _time_seconds(end1)
+            s2 = _time_seconds(start2)
+            e2 = _time_seconds(end2)
 
-            if not all([s1, e1, s2, e2]):
+            if None in (s1, e1, s2, e2):
                 return False
             
             # Check overlap: start1 < end2 AND start2 < end1
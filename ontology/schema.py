@@ -0,0 +1,77 @@
+"""
+============================================================================
+FILE: schema.py - HOSPITAL ONTOLOGY SCHEMA (TBOX)
+============================================================================
+Class and property declarations of the hospital theatre scheduling ontology,
+generated from schema.json so they are only defined in one place and once
+per ontology.
+============================================================================
+"""
+
+import json
+import os
+import types
+from functools import lru_cache
+from owlready2 import *
+
+ONTOLOGY_IRI = "http://www.hospital-scheduling.org/ontology#"
+
+# Single source of truth for the TBox: classes, parents, properties, domains, ranges
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.json")
+
+_CHARACTERISTICS = {"Functional": FunctionalProperty, "Symmetric": SymmetricProperty}
+_DATATYPES = {"str": str, "int": int, "float": float, "bool": bool}
+
+# Declared entities per ontology, so repeated builds in one process reuse the
+# same class objects instead of redefining them
+_schemas = {}
+
+@lru_cache(maxsize=1)
+def load_schema() -> dict:
+    """Parse schema.json once per process"""
+    with open(SCHEMA_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def _entity_body(doc: str, **attributes):
+    """exec_body for types.new_class: the docstring plus any class attributes"""
+    def body(namespace):
+        namespace["__doc__"] = doc
+        namespace.update(attributes)
+    return body
+
+def build_schema(onto, verbose: bool = True) -> dict:
+    """
+    Declare all classes and properties listed in schema.json in onto (once per ontology).
+    Returns a {name: class or property} mapping.
+    """
+    if onto in _schemas:
+        return _schemas[onto]
+    
+    schema = load_schema()
+    entities = {"Thing": Thing}
+    log = print if verbose else (lambda *args, **kwargs: None)
+    
+    with onto:
+        log(f"Steps 1-2/8: Creating {len(schema['classes'])} classes...")
+        for c in schema["classes"]:
+            entities[c["name"]] = types.new_class(
+                c["name"], (entities[c["parent"]],), exec_body=_entity_body(c["doc"]))
+        
+        log(f"Step 3/8: Creating {len(schema['object_properties'])} object properties with inverses...")
+        for p in schema["object_properties"]:
+            bases = (ObjectProperty,) + tuple(_CHARACTERISTICS[ch] for ch in p.get("characteristics", []))
+            attributes = {"domain": [entities[p["domain"]]], "range": [entities[p["range"]]]}
+            if "inverse" in p:
+                attributes["inverse_property"] = entities[p["inverse"]]
+            entities[p["name"]] = types.new_class(
+                p["name"], bases, exec_body=_entity_body(p["doc"], **attributes))
+        
+        log(f"Step 4/8: Creating {len(schema['data_properties'])} data properties...")
+        for p in schema["data_properties"]:
+            bases = (DataProperty,) + tuple(_CHARACTERISTICS[ch] for ch in p.get("characteristics", []))
+            attributes = {"domain": [entities[p["domain"]]], "range": [_DATATYPES[p["range"]]]}
+            entities[p["name"]] = types.new_class(
+                p["name"], bases, exec_body=_entity_body(p["doc"], **attributes))
+    
+    _schemas[onto] = {entity.name: entity for entity in list(onto.classes()) + list(onto.properties())}
+    return _schemas[onto]
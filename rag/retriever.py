@@ -1,4 +1,5 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from datetime import date
 from .vector_store import VectorStore
 from utils.ontology_to_text import OntologyToText
 from ontology.reasoner import ConflictDetector
@@ -16,14 +17,19 @@ class RAGRetriever:
     Main RAG retrieval logic - combines vector search with ontology queries
     """
     
-    def __init__(self, ontology_manager):
+    def __init__(self, ontology_manager, index_params: Dict = None):
         self.onto_mgr = ontology_manager
-        self.vector_store = VectorStore()
+        self.vector_store = VectorStore(index_params=index_params)
         self.onto_to_text = OntologyToText(ontology_manager)
         self.conflict_detector = ConflictDetector(ontology_manager)
         self.is_initialized = False
+        self._doc_texts: Dict[str, str] = {}
+        
+        # Pre-computed embeddings/contexts for anticipated queries (filled by warm_up)
+        self._warm_embeddings: Dict[str, List[float]] = {}
+        self._warm_contexts: Dict[Tuple, Dict] = {}
     
-    def initialize(self):
+    def initialize(self, batch_size: int = 64):
         """Convert ontology to text and populate vector store"""
         if self.is_initialized:
             print("ℹ️ RAG already initialized")
@@ -31,38 +37,86 @@ class RAGRetriever:
         
         print("🔄 Initializing RAG pipeline...")
         
-        # Convert ontology to text documents
-        documents = self.onto_to_text.convert_all()
+        # Start from what is already persisted so unchanged documents are not re-embedded
+        self._doc_texts = self.vector_store.get_documents()
+        count = self.refresh_documents(batch_size=batch_size)
         
-        if not documents:
+        if not count:
             print("⚠️ No documents to add to vector store")
             return
         
-        # Add to vector store
-        self.vector_store.add_documents(
-            documents=[d['text'] for d in documents],
-            metadatas=[{'type': d['type'], 'entity_id': d['entity_id']} for d in documents],
-            ids=[f"doc_{i}" for i in range(len(documents))]
-        )
-        
         self.is_initialized = True
-        print(f"✅ RAG initialized with {len(documents)} documents")
+        print(f"✅ RAG initialized with {count} documents")
+    
+    def refresh_documents(self, batch_size: int = 64) -> int:
+        """
+        Re-sync the vector store with the ontology: only documents whose text
+        changed are re-embedded, and documents of deleted entities are removed.
+        Returns the number of documents now indexed.
+        """
+        documents = self.onto_to_text.convert_all()
+        current = {f"{d['type']}_{d['entity_id']}": d for d in documents}
+        
+        changed = [doc_id for doc_id, d in current.items() if self._doc_texts.get(doc_id) != d['text']]
+        stale = [doc_id for doc_id in self._doc_texts if doc_id not in current]
+        
+        if changed:
+            self.vector_store.upsert_documents(
+                documents=[current[doc_id]['text'] for doc_id in changed],
+                metadatas=[{'type': current[doc_id]['type'], 'entity_id': current[doc_id]['entity_id']} for doc_id in changed],
+                ids=changed,
+                batch_size=batch_size
+            )
+        if stale:
+            self.vector_store.delete_documents(stale)
+        
+        self._doc_texts = {doc_id: d['text'] for doc_id, d in current.items()}
+        
+        # Warmed contexts were retrieved against the old documents
+        self._warm_contexts.clear()
+        return len(current)
+    
+    def warm_up(self, queries: List[str], top_k: int = 5):
+        """Pre-compute embeddings and retrieved context for likely first queries"""
+        for query in queries:
+            embedding = self.embed(query)
+            self._warm_embeddings[query.strip().lower()] = embedding
+            self._warm_contexts[self._context_key(query, top_k)] = self.retrieve_context(query, top_k=top_k, query_embedding=embedding)
+        print(f"✅ Warmed RAG cache with {len(queries)} queries")
+    
+    def embed(self, text: str) -> List[float]:
+        """Embed a single query with the vector store's embedding model"""
+        warm = self._warm_embeddings.get(text.strip().lower())
+        if warm is not None:
+            return warm
+        return self.vector_store.embed([text])[0]
     
-    def retrieve_context(self, user_query: str, top_k: int = 5) -> Dict:
+    @staticmethod
+    def _context_key(user_query: str, top_k: int) -> Tuple:
+        # Include today's date: relative dates ("today", "tomorrow") resolve differently each day
+        return (user_query.strip().lower(), top_k, date.today().isoformat())
+    
+    def retrieve_context(self, user_query: str, top_k: int = 5, query_embedding: List[float] = None) -> Dict:
         """
         Retrieve relevant context using hybrid approach:
         1. Detect query intent (list all vs specific entity)
         2. Vector similarity search
         3. Ontology-based factual queries
+        
+        Pass query_embedding when the caller has already embedded the query.
         """
         if not self.is_initialized:
             self.initialize()
         
+        warm = self._warm_contexts.get(self._context_key(user_query, top_k))
+        if warm is not None:
+            return warm
+        
         # Detect query intent
         query_intent = self._detect_intent(user_query)
         
         # Vector search
-        vector_results = self.vector_store.query(user_query, n_results=top_k)
+        vector_results = self.vector_store.query(user_query, n_results=top_k, query_embedding=query_embedding)
         
         # Extract entities from query
         entities = self._extract_entities(user_query)
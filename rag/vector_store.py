@@ -1,17 +1,30 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Optional
 import os
 
+# Chroma indexes embeddings with HNSW (approximate nearest-neighbour search, sublinear in
+# corpus size). These only take effect when a collection is created.
+# search_ef is raised above Chroma's default of 10 so top-k recall holds as the corpus grows.
+DEFAULT_HNSW_PARAMS = {
+    "hnsw:space": "l2",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 64
+}
+
 class VectorStore:
     """
     ChromaDB vector database for storing and retrieving embeddings
     """
     
-    def __init__(self, collection_name: str = "hospital_knowledge", persist_directory: str = "./chroma_db"):
+    def __init__(self, collection_name: str = "hospital_knowledge", persist_directory: str = "./chroma_db",
+                 index_params: Optional[Dict] = None):
         """Initialize ChromaDB"""
         self.collection_name = collection_name
         self.persist_directory = persist_directory
+        self.index_params = index_params or DEFAULT_HNSW_PARAMS
         
         # Create persist directory if it doesn't exist
         os.makedirs(persist_directory, exist_ok=True)
@@ -19,33 +32,82 @@ class VectorStore:
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(path=persist_directory)
         
+        # Keep a handle on the embedding function so queries can be embedded once and reused
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
         # Get or create collection
         try:
-            self.collection = self.client.get_collection(name=collection_name)
+            self.collection = self.client.get_collection(name=collection_name, embedding_function=self.embedding_function)
             print(f"✅ Loaded existing collection: {collection_name}")
         except:
-            self.collection = self.client.create_collection(name=collection_name)
+            self.collection = self.client.create_collection(name=collection_name, embedding_function=self.embedding_function,
+                                                            metadata=self.index_params)
             print(f"✅ Created new collection: {collection_name}")
     
-    def add_documents(self, documents: List[str], metadatas: List[Dict], ids: List[str]):
-        """Add documents to vector store"""
+    def add_documents(self, documents: List[str], metadatas: List[Dict], ids: List[str], batch_size: int = 64):
+        """Add documents to vector store, embedding them in fixed-size batches"""
         try:
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+            for start in range(0, len(documents), batch_size):
+                end = start + batch_size
+                self.collection.add(
+                    documents=documents[start:end],
+                    embeddings=self.embed(documents[start:end]),
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
             print(f"✅ Added {len(documents)} documents to vector store")
         except Exception as e:
             print(f"❌ Error adding documents: {e}")
     
-    def query(self, query_text: str, n_results: int = 5) -> Dict:
+    def upsert_documents(self, documents: List[str], metadatas: List[Dict], ids: List[str], batch_size: int = 64):
+        """Insert or replace documents by id, embedding them in fixed-size batches"""
+        try:
+            for start in range(0, len(documents), batch_size):
+                end = start + batch_size
+                self.collection.upsert(
+                    documents=documents[start:end],
+                    embeddings=self.embed(documents[start:end]),
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            print(f"✅ Upserted {len(documents)} documents to vector store")
+        except Exception as e:
+            print(f"❌ Error upserting documents: {e}")
+    
+    def delete_documents(self, ids: List[str]):
+        """Delete documents by id"""
+        try:
+            self.collection.delete(ids=ids)
+            print(f"🗑️ Deleted {len(ids)} documents from vector store")
+        except Exception as e:
+            print(f"❌ Error deleting documents: {e}")
+    
+    def get_documents(self) -> Dict[str, str]:
+        """Return all stored documents as an id -> text mapping"""
+        try:
+            results = self.collection.get(include=['documents'])
+            return dict(zip(results['ids'], results['documents']))
+        except Exception as e:
+            print(f"❌ Error reading documents: {e}")
+            return {}
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the same model the collection uses"""
+        return self.embedding_function(texts)
+    
+    def query(self, query_text: str, n_results: int = 5, query_embedding: Optional[List[float]] = None) -> Dict:
         """Query vector store for similar documents"""
         try:
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results
-            )
+            if query_embedding is not None:
+                results = self.collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results
+                )
+            else:
+                results = self.collection.query(
+                    query_texts=[query_text],
+                    n_results=n_results
+                )
             return results
         except Exception as e:
             print(f"❌ Error querying vector store: {e}")
@@ -55,7 +117,8 @@ class VectorStore:
         """Clear all documents from collection"""
         try:
             self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(name=self.collection_name)
+            self.collection = self.client.create_collection(name=self.collection_name, embedding_function=self.embedding_function,
+                                                            metadata=self.index_params)
             print("✅ Vector store cleared")
         except Exception as e:
             print(f"❌ Error clearing vector store: {e}")